@@ -0,0 +1,911 @@
+# benchmarks for the slowpp interpreter
+import sys
+import os
+import time
+import json
+import argparse
+import platform
+import subprocess
+import io
+import tempfile
+import tracemalloc
+
+from main import Interpreter, Token, optokens, ansire, hookevents, resetmodules, ASS, MAT, LOG, INT, STR, FLO, LST, DCT, PAR, DOT, SEP, SYM, KWD, EQU, FUN, REF, CON, PYC, CLR, AUD, DMP, EXS
+
+# the directory of the benchmarks, interpreters are made with its code.spp so the benchmarks can be run from any directory
+here = os.path.dirname(os.path.abspath(__file__))
+codefile = os.path.join(here, "code")
+
+# the tokenizer that was replaced by the single pass lexer, kept as a reference point for the benchmark
+def legacy_tokenize (self, line : str) -> list:
+    # token list
+    tokens = []
+    # index
+    i = 0
+    while i < len(line):
+        # updates self.tokens
+        self.tokens = tokens
+        # gets current character
+        char = line[i]
+        # checks for line seperation character
+        if (char == "\n" or char == ";"):
+            # increments i
+            i += 1
+            # continues tokenizing
+            continue
+        # checks for comments
+        elif (i < len(line)-1 and line[i:i+2] == "//"):
+            # if the end of comment was found
+            found = False
+            isstr = False
+            # gets the end of the comment
+            while i < len(line):
+                if (line[i] == '"' and line[i-1] != "\\"):
+                    isstr = not isstr
+                if (line[i] == "\n" and not isstr):
+                    found = True
+                    break
+                i += 1
+            # breaks tokenizer loop if the comment lasted until end of code
+            if (not found):
+                break
+        # checks for mathmatical operation
+        elif (char in "+-*/%"):
+            # checks if the operation is an assignment
+            if (i < len(line)-1 and line[i+1] == "="):
+                # adds assignment token
+                tokens.append(Token(ASS, char+"="))
+                # increases i
+                i += 2
+                # continues tokenizing
+                continue
+            # adds mathmatical operator token
+            tokens.append(Token(MAT, char))
+        # checks for assignment
+        elif (char == "="):
+            # checks for equality
+            if (len(line) > i and line[i:i+2] == "=="):
+                # adds equality token
+                tokens.append(Token(EQU, "=="))
+                # increases i
+                i += 2
+                # continues tokenizing
+                continue
+            # adds assignment token
+            tokens.append(Token(ASS, char))
+        # checks for comparison
+        elif (char in "<>"):
+            v = char
+            if (len(line) > i and line[i+1] == "="):
+                v += "="
+                i += 1
+            tokens.append(Token(EQU, v))
+        # checks for logical operators
+        elif (char in "!&|^"):
+            # checks for equality
+            if (i < len(line)-1 and line[i+1] == "=" and char not in "&|^"):
+                # adds equality token
+                tokens.append(Token(EQU, char+"="))
+                # increases i
+                i += 2
+                # continues tokenizing
+                continue
+            # adds logical operator token
+            tokens.append(Token(LOG, char))
+        # checks for curly brackets
+        elif (char in "{}"):
+            # adds dictionary token
+            tokens.append(Token(DCT, char))
+        # checks for square brackets
+        elif (char in "[]"):
+            # adds list token
+            tokens.append(Token(LST, char))
+        # checks for parentheses
+        elif (char in "()"):
+            # adds parentheses token
+            tokens.append(Token(PAR, char))
+        # checks for dot syntax
+        elif (char == "."):
+            # adds dot token
+            tokens.append(Token(DOT, char))
+        # checks for comma
+        elif (char == ","):
+            # adds seperator token
+            tokens.append(Token(SEP, char))
+        # checks for colon
+        elif (char in ":"):
+            # adds symbol token
+            tokens.append(Token(SYM, char))
+        # checks for string opening
+        elif (char == '"'):
+            # if the end of the string was found
+            found = False
+            # char index
+            ci = i+1
+            # loops over code
+            while ci < len(line):
+                # checks if char is string ending
+                if (line[ci] == '"' and line[ci-1] != "\\"):
+                    # breaks out of loop
+                    found = True
+                    break
+                # increments char index
+                ci += 1
+            # if end of string wasn't found
+            if (not found):
+                # unclosed string
+                raise Exception(2)
+            # adds string token
+            tokens.append(Token(STR, line[i+1:ci]))
+            # increases i
+            i = ci
+        # checks for number
+        elif (char.isdigit()):
+            fin = ""
+            s = i
+            # if number is float
+            deciuse = False
+            # loops over code
+            while line[s].isdigit() and s < len(line):
+                # gets test character
+                c = line[s]
+                # adds it to final
+                fin += c
+                # increments s
+                s += 1
+                # checks that s is a valid index for code
+                if (s >= len(line)):
+                    break
+                # checks for a decimal
+                if (line[s] == "."):
+                    # if decimal already used
+                    if (deciuse):
+                        break
+                    # if next character is also a decimal
+                    if (line[s+1] == "."):
+                        break
+                    # if next character is start of a name
+                    if (line[s+1].isalpha()):
+                        break
+                    # sets float flag to true
+                    deciuse = True
+                    # adds decimal
+                    fin += "."
+                    # increments s
+                    s += 1
+            # increases i
+            i = s-1
+            # adds float token if decimal was used else adds integer token
+            tokens.append(Token(FLO if deciuse else INT, float(fin) if deciuse else int(fin)))
+        else:
+            found = False
+            # loops over all keywords
+            for keyword in self.keywords:
+                # checks that the line isn't longer than the keyword
+                if (len(line)-i >= len(keyword)):
+                    # gets where the keyword could be
+                    test = line[i:i+len(keyword)]
+                    # checks for a match with the keyword
+                    if (test == keyword):
+                        # tells the tokenizer that a keyword was found
+                        found = True
+                        # appends keyword token
+                        tokens.append(Token(KWD, test))
+                        # sets program flags
+                        if (keyword == "flag"):
+                            # gets keyword arguments
+                            sec = line[i:(i+line[i:].index("\n")) if "\n" in line[i:] else i+len(line[i:])].split(" ")
+                            # appends config token
+                            tokens.append(Token(CON, (sec[1], sec[2][:-1 if sec[2][-1] == "\n" else len(sec[2])])))
+                            # increases i
+                            i += len(" ".join(sec))
+                            break
+                        # sets system colors
+                        if (keyword == "color"):
+                            # gets rest of code
+                            rest = line[i + len(keyword) + 1:]
+                            # gets code to end of line
+                            v = line[i + len(keyword) + 1:(rest.index("\n")+i+len(keyword)+1) if "\n" in rest else len(line)]
+                            # increases i
+                            i += len(v) + len(keyword) + 1
+                            # splits v by spaces
+                            v = v.split(" ")
+                            # gets the first two items of v
+                            v = v[:min(2, len(v))]
+                            # checks that v has two items
+                            if (len(v) < 2):
+                                break
+                            # checks that the property exists
+                            if (self.colors.has(v[0])):
+                                # checks if the color given is ANSI
+                                if (ansire.fullmatch(v[1])):
+                                    # adds color tokens
+                                    tokens.append(Token(CLR, v[0]))
+                                    tokens.append(Token(CLR, v[1].replace("\\x1b", "\x1b")))
+                                else:
+                                    # tries to convert from common colors to ANSI
+                                    commoncolors = {"lime":"\x1b[38;2;0;255;0m","green":"\x1b[38;2;0;200;0m","orange":"\x1b[38;2;200;100;0m","yellow":"\x1b[38;2;255;255;0m","red":"\x1b[38;2;255;0;0m"}
+                                    if (v[1] not in commoncolors.keys()):
+                                        break
+                                    # adds color tokens
+                                    tokens.append(Token(CLR, v[0]))
+                                    tokens.append(Token(CLR, commoncolors[v[1]]))
+                            break
+                        # variable auditing
+                        if (keyword == "audit"):
+                            # checks if an argument was given
+                            if (len(line) > i + len(keyword) and line[i + len(keyword)] == " "):
+                                # gets rest of the code
+                                rest = line[i + len(keyword) + 1:]
+                                v = line[i + len(keyword) + 1:(rest.index("\n")+i+len(keyword)+1) if "\n" in rest else len(line)]
+                                # adds audit token
+                                tokens.append(Token(AUD, v))
+                                # increases i
+                                i += len(v) + 1
+                            i += len(keyword)
+                            break
+                        # dumps data
+                        if (keyword == "dump"):
+                            # checks that an argument is present
+                            if (len(line) > i + len(keyword) and line[i + len(keyword)] == " "):
+                                # gets the rest of the code
+                                rest = line[i + len(keyword) + 1:]
+                                v = line[i + len(keyword) + 1:(rest.index("\n")+i+len(keyword)+1) if "\n" in rest else len(line)]
+                                # checks that v is a valid object to dump
+                                if (v in ("global", "local", "constant", "tokens", "space")):
+                                    # adds dump token
+                                    tokens.append(Token(DMP, v))
+                                else:
+                                    print(f"{self.colors.output}{v}{self.colors.reset}", len(v))
+                                # increases i
+                                i += len(v) + 1
+                            i += len(keyword)
+                            break
+                        # checks whether a variable exists
+                        if (keyword == "existing"):
+                            # checks that there is an argument
+                            if (len(line) > i + len(keyword) and line[i + len(keyword)] == " "):
+                                # get the rest of the code
+                                rest = line[i + len(keyword) + 1:]
+                                v = line[i + len(keyword) + 1:(rest.index("\n")+i+len(keyword)+1) if "\n" in rest else len(line)]
+                                # adds the existing token
+                                tokens.append(Token(EXS, v))
+                                # increases i
+                                i += len(v) + 1
+                            i += len(keyword)
+                            break
+                        # watches for variable changes
+                        if (keyword == "watch"):
+                            # gets the rest of the code
+                            rest = line[i + len(keyword) + 1:]
+                            # checks that there is code after the watch statement
+                            if ("\n" not in rest):
+                                raise Exception(3)
+                            # gets variable name
+                            end = rest.index("\n")+i+len(keyword)+1
+                            v = line[i + len(keyword) + 1:end]
+                            # increses i
+                            i = end
+                            # adds audit
+                            self.scopes.add_audit(v)
+                            break
+                        # executes python code
+                        if (keyword == "python"):
+                            # checks that there is a code block after the python keyword
+                            if (line[i + len(keyword)] == "{" or line[i + len(keyword):i + len(keyword) + 2] == " {"):
+                                # gets the python code
+                                tstart = i+len(keyword)+(1 if line[i + len(keyword)] != "{" else 0)
+                                test = line[tstart:]
+                                t2 = test[2:]
+                                i2 = 0
+                                depth = 1
+                                while i2 < len(t2):
+                                    if (t2[i2] == "{"):
+                                        depth += 1
+                                    if (t2[i2] == "}"):
+                                        depth -= 1
+                                    if (depth == 0):
+                                        break
+                                    i2 += 1
+                                t2 = t2[:i2-1]
+                                # adds the python token
+                                tokens.append(Token(PYC, t2))
+                                # increases i
+                                i = tstart + i2 + 3
+                            break
+                        # increases i
+                        i += len(keyword)
+                        break
+            # continues tokenizing
+            if (found):
+                continue
+            # gets to end of alphanumeric characters
+            ti = i
+            while ti < len(line):
+                if (not line[ti].isalnum() and not line[ti] == "_"):
+                    break
+                ti += 1
+            # if len wasn't zero
+            if (ti != i):
+                # adds reference token
+                tokens.append(Token(REF, line[i:ti]))
+            # increments ti if ti didn't change
+            if (ti == i):
+                ti += 1
+            # increases i
+            i = ti
+            # continues tokenizing
+            continue
+        # increments i
+        i += 1
+    # updates self.tokens
+    self.tokens = tokens
+    # returns tokens
+    return tokens
+
+# the line splitter that was replaced by breaklines, kept as a reference point for the benchmark
+def legacy_breaklines (data : str) -> list:
+    # changes \\n to \n
+    data = data.replace("\\n", "\n")
+    # splits at newliines
+    data = data.split("\n")
+    # initial length
+    inlen = len(data)-1
+    # if the current part is in a string
+    isstr = False
+    for i in range(len(data)):
+        # goes from last to first
+        i = inlen-i
+        # checks that i is less than the length of the data
+        if (i >= len(data)):
+            break
+        # gets line
+        line = data[i]
+        # if a string is being opened or closed
+        if (line.count('"') % 2 != 0):
+            # if the current part is a string
+            if (isstr):
+                # combines the parts of the line
+                line = line + "\n" + data.pop(i+1)
+                data[i] = line
+            # toggles isstr
+            isstr = not isstr
+        # if current part is a string
+        elif (isstr):
+            # combines the parts of the line
+            line += "\n" + data.pop(i+1)
+            data[i] = line
+    # returns the lines
+    return data
+
+# generates a slowpp program with roughly the given number of lines
+def genprogram (lines : int) -> str:
+    # statements that get repeated
+    parts = [
+        "func helper{0} (a, b = 2) {{\n    return a * b + {0}\n}}",
+        "value{0} = helper{0}(value{1} + 3.5, {0}) // calls the helper",
+        "text{0} = \"line {0} of the program\" + \"!\"",
+        "check{0} = value{0} >= {0} == true",
+        "flag audit off",
+        "python {{\n    x = {0}\n}}",
+    ]
+    out = ["value0 = 1"]
+    i = 1
+    while len(out) < lines:
+        out.append(parts[i % len(parts)].format(i, i-1))
+        i += 1
+    return "\n".join(out) + "\n"
+
+# times a function, returns the best time out of the given number of runs
+def timeit (func, *args, runs : int = 5) -> float:
+    best = float("inf")
+    for i in range(runs):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+# benchmarks the tokenizer against the legacy tokenizer
+def bench_tokenize (lines : int = 20000) -> None:
+    inter = Interpreter(codefile, suppress=True)
+    code = genprogram(lines)
+    # checks that both tokenizers agree before timing them
+    new = inter.tokenize(code)
+    if (new != legacy_tokenize(inter, code)):
+        raise Exception("tokenizers disagree")
+    count = len(new)
+    oldt = timeit(legacy_tokenize, inter, code)
+    newt = timeit(inter.tokenize, code)
+    print(f"tokenize ({lines} lines, {count} tokens)")
+    print(f"\tlegacy : {count/oldt:>12,.0f} tokens/sec")
+    print(f"\tlexer  : {count/newt:>12,.0f} tokens/sec ({oldt/newt:.1f}x)")
+
+# generates a program of the given number of lines where every other statement assigns a string spanning three lines
+def genmultiline (lines : int) -> str:
+    out = []
+    for i in range(lines // 4):
+        out.append(f"value{i} = {i} * 2")
+        out.append(f"text{i} = \"first line of {i}\n\tsecond line\\nescaped line\n\tlast line\"")
+    return "\n".join(out) + "\n"
+
+# benchmarks the line splitter against the legacy line splitter
+def bench_lines (lines : int = 100000) -> None:
+    inter = Interpreter(codefile, suppress=True)
+    code = genmultiline(lines)
+    # checks that both splitters agree before timing them
+    new = inter.breaklines(code)
+    if (new != legacy_breaklines(code)):
+        raise Exception("line splitters disagree")
+    oldt = timeit(legacy_breaklines, code, runs=1)
+    spant = timeit(inter.linespans, code)
+    newt = timeit(inter.breaklines, code)
+    print(f"lines ({code.count(chr(10))} lines, {len(new)} statements)")
+    print(f"\tlegacy     : {oldt*1000:>10.1f} ms")
+    print(f"\tlinespans  : {spant*1000:>10.1f} ms ({oldt/spant:.1f}x)")
+    print(f"\tbreaklines : {newt*1000:>10.1f} ms ({oldt/newt:.1f}x)")
+
+# dispatches on token types the way the evaluator does
+def dispatch (tokens : list) -> int:
+    n = 0
+    for token in tokens:
+        t = token.type
+        if (t == MAT):
+            n += 1
+        elif (t == EQU):
+            n += 2
+        elif (t == KWD):
+            n += 3
+        elif (t == REF):
+            n += 4
+    return n
+
+# measures the memory used per token and the cost of dispatching on token types
+def bench_tokens (lines : int = 20000) -> None:
+    inter = Interpreter(codefile, suppress=True)
+    code = genprogram(lines)
+    # measures the memory allocated while tokenizing
+    tracemalloc.start()
+    tokens = inter.tokenize(code)
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    count = len(tokens)
+    print(f"tokens ({lines} lines, {count} tokens)")
+    print(f"\tmemory   : {used/count:>8.1f} bytes/token")
+    print(f"\tdispatch : {timeit(dispatch, tokens)/count*1e9:>8.1f} ns/token")
+
+# generates a program of arithmetic on variables and constants
+def genarith (lines : int) -> str:
+    out = ["a = 3", "b = 4.5"]
+    for i in range(lines):
+        out.append(f"x{i%50} = (a + {i}) * 2 - b / 4 + {i} % 7 * a - (b - {i}) * 3")
+    return "\n".join(out) + "\n"
+
+# generates a program of function calls
+def gencalls (lines : int) -> str:
+    out = ["func f (x, y = 2) {", "    return x * y + 1", "}"]
+    for i in range(lines):
+        out.append(f"r{i%50} = f({i}, 3) + f({i})")
+    return "\n".join(out) + "\n"
+
+# benchmarks the tree walker against the virtual machine
+def bench_engines (lines : int = 2000) -> None:
+    inter = Interpreter(codefile, suppress=True)
+    # memoization is turned off so calls are timed instead of memo lookups
+    inter.memosize = 0
+    for name, code in (("arithmetic", genarith(lines)), ("calls", gencalls(lines))):
+        # parses and compiles once so only execution is timed
+        nodes = inter.parse(inter.tokenize(code))
+        compiled = inter.compile(nodes)
+        astt = timeit(inter.execute, nodes)
+        vmt = timeit(inter.runcode, compiled)
+        print(f"{name} ({lines} statements)")
+        print(f"\tast : {lines/astt:>12,.0f} statements/sec")
+        print(f"\tvm  : {lines/vmt:>12,.0f} statements/sec ({astt/vmt:.1f}x)")
+
+# generates calls to a pure function that repeat the same arguments
+def genmemo (lines : int) -> str:
+    out = ["func f (x, y = 2) {", "    a = x * y + 1", "    b = a * a - x", "    return b * y + a", "}"]
+    for i in range(lines):
+        out.append(f"r{i%50} = f({i%16}, 3) + f({i%16})")
+    return "\n".join(out) + "\n"
+
+# benchmarks calls to pure functions with and without memoization
+def bench_memo (lines : int = 2000) -> None:
+    print(f"memo ({lines} statements)")
+    for engine in ("ast", "vm"):
+        inter = Interpreter(codefile, suppress=True)
+        nodes = inter.parse(inter.tokenize(genmemo(lines)))
+        run = inter.execute if engine == "ast" else inter.runcode
+        code = nodes if engine == "ast" else inter.compile(nodes)
+        inter.memosize = 0
+        plain = timeit(run, code)
+        inter.memosize = 128
+        memo = timeit(run, code)
+        print(f"\t{engine:<3} : {lines/plain:>12,.0f} -> {lines/memo:>12,.0f} statements/sec ({plain/memo:.1f}x)")
+
+# programs run by both engines by the engine check, each is run from a file so flags and errors work like they do for real programs
+enginescripts = {
+    "scoping":"func inner () {\n    return secret\n}\nfunc outer () {\n    secret = 5\n    return inner()\n}\nsecret = 1\nprint(outer())\n",
+    "undefined":"func inner () {\n    return hidden\n}\nfunc outer () {\n    hidden = 5\n    return inner()\n}\nprint(outer())\n",
+    "shadowing":"x = 1\nfunc f (x) {\n    x += 1\n    return x\n}\nprint(f(10), x)\n",
+    "globals":"total = 3\nfunc add (a, b = 2) {\n    return a + b + total\n}\nprint(add(1), add(1, 1))\n",
+    "nested calls":"func double (n) {\n    return n * 2\n}\nfunc quad (n) {\n    return double(double(n))\n}\nprint(quad(3), quad(1.5))\n",
+    "arithmetic":"a = 3\nb = 4.5\nc = (a + 2) * b - a % 2 / 4\nd = a > 2 & b < 5\nprint(c, d, -a, !d)\n",
+    "strings":"s = \"a\"\nfunc grow (t) {\n    t += \"b\"\n    t += \"c\"\n    return t\n}\ns += grow(s)\nprint(s)\n",
+    "arrays":"v = [1, 2, 3]\nw = v * 2 + 1\nprint(w, w > 4)\n",
+    "varargs":"func count (first, ...rest) {\n    return first\n}\nprint(count(1, 2, 3))\n",
+    "missing argument":"func f (a, b) {\n    return a\n}\nprint(f(1))\n",
+    "type error":"x = 1\ny = x + \"a\"\nprint(y)\n",
+    "division by zero":"x = 1\ny = x / 0\nprint(y)\n",
+    "constant assignment":"true = 1\n",
+    "global appends":"s = \"a\"\nfunc g () {\n    s = \"z\"\n    return \"q\"\n}\ns += \"b\"\ns += g()\nn = 1\nn += 2\nprint(s, n)\n",
+}
+
+# writes a program to a file in the directory, returns its path
+def writescript (directory : str, name : str, code : str, header : str = "flag cache off\n") -> str:
+    path = os.path.join(directory, name.replace(" ", "_") + ".spp")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(header + code)
+    return path
+
+# runs a program with an engine, returns its output, the error code it stopped with and its global variables
+def runengine (directory : str, name : str, code : str, engine : str) -> tuple:
+    path = writescript(directory, name, code)
+    out = io.StringIO()
+    inter = Interpreter(path, suppress=True, engine=engine, output=out)
+    error = inter.run()
+    return (out.getvalue(), error, {key:value.dump() for key, value in inter.scopes[1].value.items() if value.type != FUN})
+
+# runs every engine script with both engines, returns the names of the scripts the engines disagree on
+def check_engines () -> list:
+    mismatched = []
+    print(f"engines ({len(enginescripts)} scripts)")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, code in enginescripts.items():
+            ast = runengine(directory, name, code, "ast")
+            vm = runengine(directory, name, code, "vm")
+            # the error output of the virtual machine says which line it stopped on instead of listing statements
+            same = ast[1:] == vm[1:] and (ast[1] is not None or ast[0] == vm[0])
+            print(f"\t{name:<20} : {'same' if same else 'DIFFERENT'}{'' if ast[1] is None else f' (error {ast[1]})'}")
+            if (not same):
+                mismatched.append(name)
+                print(f"\t\tast : {ast}\n\t\tvm  : {vm}")
+    return mismatched
+
+# runs a program with an engine and a hook attached to every event, returns the events in the order they were seen
+def runhooks (directory : str, name : str, code : str, engine : str) -> list:
+    inter = Interpreter(writescript(directory, name, code), suppress=True, engine=engine, output=io.StringIO())
+    seen = []
+    for event in hookevents:
+        inter.add_hook(event, lambda *args, event=event: seen.append((event,) + tuple(str(arg) for arg in args)))
+    inter.run()
+    return seen
+
+# runs every engine script with both engines, returns the names of the scripts the engines fire different hooks for
+def check_hooks () -> list:
+    mismatched = []
+    print(f"hooks ({len(enginescripts)} scripts)")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, code in enginescripts.items():
+            ast = runhooks(directory, name, code, "ast")
+            vm = runhooks(directory, name, code, "vm")
+            print(f"\t{name:<20} : {'same' if ast == vm else 'DIFFERENT'} ({len(ast)} events)")
+            if (ast != vm):
+                mismatched.append(name)
+                print(f"\t\tast : {ast}\n\t\tvm  : {vm}")
+    return mismatched
+
+# removes the recent execution dump from output, streamed code doesn't keep its source so its dump lists statement types instead of lines
+def withoutrecent (text : str) -> str:
+    start = text.find("dumping recent execution\n")
+    if (start == -1):
+        return text
+    end = text.find("end dump\n", start)
+    return text[:start] + text[end+len("end dump\n"):]
+
+# programs run plain and streamed by the stream check and the output each has to start with, output written before an error has to be kept
+streamscripts = {
+    "output then error":("print(1)\nprint(2)\nx = 1 / 0\nprint(3)\n", "1\n2\n"),
+    "raised error":("flag error on\nprint(1)\nprint(2)\nx = 1 / 0\n", "1\n2\n"),
+    "error in call":("func f (a) {\n    return a + \"b\"\n}\nprint(0)\nprint(f(1))\n", "0\n"),
+    "long output":("".join(f"print({i})\n" for i in range(600)) + "x = missing\n", "".join(f"{i}\n" for i in range(600))),
+}
+
+# runs a program plain or streamed, returns its output and the error code it stopped with or the error it raised
+def runstream (directory : str, name : str, code : str, stream : bool) -> tuple:
+    out = io.StringIO()
+    inter = Interpreter(writescript(directory, name, code), suppress=True, stream=stream, output=out)
+    try:
+        error = inter.run()
+    except Exception as e:
+        error = f"raised {e.args[0] if e.args else type(e).__name__}"
+    return (out.getvalue(), error)
+
+# runs every stream script plain and streamed, returns the names of the scripts whose output or errors differ or that lost output
+def check_stream () -> list:
+    mismatched = []
+    print(f"stream ({len(streamscripts)} scripts)")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, (code, start) in streamscripts.items():
+            plain = runstream(directory, name, code, False)
+            streamed = runstream(directory, name, code, True)
+            same = plain[1] == streamed[1] and withoutrecent(plain[0]) == withoutrecent(streamed[0]) and streamed[0].startswith(start)
+            print(f"\t{name:<20} : {'same' if same else 'DIFFERENT'}{'' if plain[1] is None else f' (error {plain[1]})'}")
+            if (not same):
+                mismatched.append(name)
+                print(f"\t\tplain    : {plain}\n\t\tstreamed : {streamed}")
+    return mismatched
+
+# code split into lines by the line check, the quotes in the unbalanced ones don't pair up
+linescripts = {
+    "multiline":genmultiline(40),
+    "escaped newlines":"a = \"x\\ny\"\nb = 1\\nc = 2\n",
+    "unbalanced":"a = 1\nb = \"open\nc = 2\nd = 3\n",
+    "unbalanced pairs":"a = \"x\"\nb = \"\nc = 1\nd = \"\ne = 2\nf = \"\ng = 3\n",
+    "unbalanced last":"a = 1\nb = 2\nc = \"",
+    "quotes only":"\"\n\"\n\"\\n\"\"\n",
+}
+
+# splits every line script with breaklines and the legacy splitter, returns the names of the scripts they disagree on
+def check_lines () -> list:
+    inter = Interpreter(codefile, suppress=True)
+    mismatched = []
+    print(f"lines ({len(linescripts)} scripts)")
+    for name, code in linescripts.items():
+        new = inter.breaklines(code)
+        old = legacy_breaklines(code)
+        print(f"\t{name:<20} : {'same' if new == old else 'DIFFERENT'}")
+        if (new != old):
+            mismatched.append(name)
+            print(f"\t\tnew    : {new}\n\t\tlegacy : {old}")
+    return mismatched
+
+# programs run twice by the cache check, the second run loads the tokens the first run saved, long strings are kept as offsets into the file
+cachescripts = {
+    "long strings":"short = \"ab\"\nlong = \"" + "long string " * 10 + "\"\nprint(short, long)\n",
+    "multiline strings":"text = \"first\nsecond\\nthird " + "x" * 80 + "\"\nprint(text)\n",
+    "non ascii":"text = \"caf\u00e9 " + "x" * 80 + "\"\nprint(text)\n",
+    "flags and errors":"flag optimize off\nx = 1 + 2\nprint(x)\ny = x / 0\n",
+}
+
+# runs a program, returns its output and the error code it stopped with
+def runcached (path : str) -> tuple:
+    out = io.StringIO()
+    error = Interpreter(path, suppress=True, output=out).run()
+    return (out.getvalue(), error)
+
+# runs every cache script twice with the token cache on, returns the names of the scripts whose cached tokens or second run differ
+def check_cache () -> list:
+    mismatched = []
+    print(f"cache ({len(cachescripts)} scripts)")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, code in cachescripts.items():
+            path = writescript(directory, name, code, "")
+            first = runcached(path)
+            # the tokens loaded from the cache have to be the tokens lexing the file gives
+            inter = Interpreter(path, suppress=True)
+            cached = inter._loadcache(inter._cachekey())
+            lexed = inter._tokenizemapped()
+            tokens = cached is not None and [token.dump() for token in cached] == [token.dump() for token in lexed]
+            inter._closesource()
+            second = runcached(path)
+            same = tokens and first == second
+            print(f"\t{name:<20} : {'same' if same else 'DIFFERENT'}{'' if first[1] is None else f' (error {first[1]})'}")
+            if (not same):
+                mismatched.append(name)
+                print(f"\t\tcached tokens : {'missing' if cached is None else 'same' if tokens else 'different'}\n\t\tfirst  : {first}\n\t\tsecond : {second}")
+    return mismatched
+
+# modules imported by the import check's programs, keyed by name, the cycle modules use each other's variables while loading and the lazy ones only once both are loaded
+importmodules = {
+    "cycle_e":"import cycle_f\ny = cycle_f.v\nv2 = 1\n",
+    "cycle_f":"import cycle_e\nv = cycle_e.v2\n",
+    "lazy_a":"import lazy_b\nfunc fa () {\n    return lazy_b.fb()\n}\naval = 1\n",
+    "lazy_b":"import lazy_a\nearly = lazy_a.aval\nfunc fb () {\n    return early + 1\n}\n",
+}
+
+# programs run by both engines by the import check and the error code each has to stop with
+importscripts = {
+    "cycle":("import cycle_e\nprint(cycle_e.y)\n", 12),
+    "lazy cycle":("import lazy_a\nprint(lazy_a.fa())\n", None),
+    "missing module":("import nowhere\nprint(nowhere.x)\n", 11),
+}
+
+# runs every import script with both engines, returns the names of the scripts the engines disagree on or that stop with the wrong error
+def check_imports () -> list:
+    mismatched = []
+    print(f"imports ({len(importscripts)} scripts)")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, code in importmodules.items():
+            writescript(directory, name, code)
+        for name, (code, expected) in importscripts.items():
+            results = []
+            for engine in ("ast", "vm"):
+                out, error = runengine(directory, name, code, engine)[:2]
+                results.append((withoutrecent(out), error))
+                # modules are loaded again by the next run
+                resetmodules()
+            same = results[0] == results[1] and results[0][1] == expected
+            print(f"\t{name:<20} : {'same' if same else 'DIFFERENT'}{'' if expected is None else f' (error {expected})'}")
+            if (not same):
+                mismatched.append(name)
+                print(f"\t\tast : {results[0]}\n\t\tvm  : {results[1]}")
+    return mismatched
+
+# code run in a new process by the startup benchmarks, prints the seconds taken to import main and to run a one statement program after importing
+startupcode = """
+import sys, time
+start = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+import main
+imported = time.perf_counter()
+main.Interpreter("first")
+print(imported - start, time.perf_counter() - imported)
+"""
+
+# starts the interpreter in a new process in a directory without code.spp, returns the seconds taken to import main, to run the first statement and by the whole process
+def startup (directory : str) -> tuple:
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", startupcode, here], cwd=directory, check=True, capture_output=True, text=True).stdout
+    total = time.perf_counter() - start
+    imported, first = map(float, out.split()[-2:])
+    return imported, first, total
+
+# makes a directory with a one statement program for the startup benchmarks
+def startupdir () -> tempfile.TemporaryDirectory:
+    directory = tempfile.TemporaryDirectory()
+    with open(os.path.join(directory.name, "first.spp"), "w") as f:
+        f.write("x = 1\n")
+    return directory
+
+# benchmarks cold starts, the time to import main and the time to run the first statement of a short script
+def bench_startup (runs : int = 10) -> None:
+    with startupdir() as directory:
+        # the first run writes the token cache, later runs load it like repeated runs of a script do
+        startup(directory)
+        results = [startup(directory) for i in range(runs)]
+        # python's own startup for comparison
+        bare = min(timeit(subprocess.run, [sys.executable, "-c", "pass"], runs=1) for i in range(runs))
+    print(f"startup ({runs} runs, best)")
+    print(f"\tpython     : {bare*1000:>8.2f} ms")
+    print(f"\timport     : {min(r[0] for r in results)*1000:>8.2f} ms")
+    print(f"\tfirst stmt : {min(r[1] for r in results)*1000:>8.2f} ms")
+    print(f"\tprocess    : {min(r[2] for r in results)*1000:>8.2f} ms")
+
+# times tokenizing a generated program, counts tokens
+def suite_tokenize (lines : int):
+    inter = Interpreter(codefile, suppress=True)
+    code = genprogram(lines)
+    return timeit(inter.tokenize, code), len(inter.tokenize(code))
+
+# times splitting a generated program into lines, counts lines
+def suite_breaklines (lines : int):
+    inter = Interpreter(codefile, suppress=True)
+    code = genprogram(lines)
+    return timeit(inter.breaklines, code), lines
+
+# times running arithmetic statements with an engine, counts statements
+def suite_evaluate (lines : int, engine : str):
+    inter = Interpreter(codefile, suppress=True)
+    nodes = inter.parse(inter.tokenize(genarith(lines)))
+    if (engine == "vm"):
+        return timeit(inter.runcode, inter.compile(nodes)), lines
+    return timeit(inter.execute, nodes), lines
+
+# times domod on its own, counts operations
+def suite_domod (lines : int):
+    inter = Interpreter(codefile, suppress=True)
+    ops = [(Token(INT, i), optokens["+-*/%"[i % 5]], Token(FLO, i % 7 + 1.5)) for i in range(lines)]
+    def run ():
+        for base, op, mod in ops:
+            inter.domod(base, op, mod)
+    return timeit(run), lines
+
+# times function calls with an engine, counts calls
+def suite_calls (lines : int, engine : str):
+    inter = Interpreter(codefile, suppress=True)
+    # memoization is turned off so calls are timed instead of memo lookups
+    inter.memosize = 0
+    nodes = inter.parse(inter.tokenize(gencalls(lines)))
+    if (engine == "vm"):
+        return timeit(inter.runcode, inter.compile(nodes)), lines * 2
+    return timeit(inter.execute, nodes), lines * 2
+
+# times looking up a global variable from under the given number of local scopes, counts lookups
+def suite_deref (lines : int, depth : int):
+    inter = Interpreter(codefile, suppress=True)
+    inter.scopes[1]["target"] = Token(INT, 1)
+    for i in range(depth):
+        inter.scopes.new_scope()
+        inter.scopes[-1][f"local{i}"] = Token(INT, i)
+    ref = Token(REF, "target")
+    def run ():
+        for i in range(lines):
+            inter.deref(ref)
+    return timeit(run), lines
+
+# times starting the interpreter in a new process and running a one statement program, counts starts
+def suite_startup (lines : int):
+    with startupdir() as directory:
+        startup(directory)
+        return timeit(startup, directory), 1
+
+# benchmarks of the regression suite, each is called with the program size and gives the best time and the number of operations timed
+suite = {
+    "tokenize":lambda lines: suite_tokenize(lines),
+    "breaklines":lambda lines: suite_breaklines(lines),
+    "evaluate_ast":lambda lines: suite_evaluate(lines // 10, "ast"),
+    "evaluate_vm":lambda lines: suite_evaluate(lines // 10, "vm"),
+    "domod":lambda lines: suite_domod(lines),
+    "calls_ast":lambda lines: suite_calls(lines // 10, "ast"),
+    "calls_vm":lambda lines: suite_calls(lines // 10, "vm"),
+    "deref_1":lambda lines: suite_deref(lines, 1),
+    "deref_8":lambda lines: suite_deref(lines, 8),
+    "deref_32":lambda lines: suite_deref(lines, 32),
+    "startup":lambda lines: suite_startup(lines),
+}
+
+# runs the regression suite, returns nanoseconds per operation keyed by benchmark name
+def run_suite (lines : int = 20000, names : list = None) -> dict:
+    results = {}
+    for name in (names or suite):
+        seconds, ops = suite[name](lines)
+        results[name] = seconds / ops * 1e9
+        print(f"\t{name:<14} : {results[name]:>14,.1f} ns/op")
+    return results
+
+# compares results against a baseline, returns the names of benchmarks that got slower than the threshold allows
+def compare (results : dict, baseline : dict, threshold : float) -> list:
+    regressed = []
+    for name, value in results.items():
+        if (name not in baseline):
+            continue
+        change = value / baseline[name] - 1
+        status = "REGRESSED" if change > threshold else "ok"
+        print(f"\t{name:<14} : {baseline[name]:>14,.1f} -> {value:>14,.1f} ns/op ({change:+.1%}) {status}")
+        if (change > threshold):
+            regressed.append(name)
+    return regressed
+
+if (__name__ == "__main__"):
+    parser = argparse.ArgumentParser(description="benchmarks the slowpp interpreter")
+    parser.add_argument("lines", nargs="?", type=int, default=20000, help="size of the generated programs")
+    parser.add_argument("--suite", action="store_true", help="runs the regression suite instead of the comparison benchmarks")
+    parser.add_argument("--baseline", default=os.path.join(here, "bench_baseline.json"), help="baseline file the suite is compared against")
+    parser.add_argument("--check", action="store_true", help="only runs the checks")
+    parser.add_argument("--save", action="store_true", help="saves the suite results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="fraction a benchmark can get slower before it counts as a regression")
+    args = parser.parse_args()
+    # both engines, streamed and plain runs, both line splitters and cached and lexed tokens have to give the same results before they are timed
+    mismatched = check_engines() + check_hooks() + check_stream() + check_lines() + check_cache() + check_imports()
+    if (mismatched or args.check):
+        sys.exit(1 if mismatched else 0)
+    if (not args.suite):
+        bench_tokenize(args.lines)
+        bench_tokens(args.lines)
+        bench_lines(args.lines * 5)
+        bench_engines(args.lines // 10)
+        bench_memo(args.lines // 10)
+        bench_startup()
+        sys.exit(0)
+    print(f"suite ({args.lines} lines)")
+    results = run_suite(args.lines)
+    # saves the baseline
+    if (args.save):
+        with open(args.baseline, "w") as f:
+            json.dump({"lines":args.lines, "python":platform.python_version(), "results":results}, f, indent=4)
+        print(f"saved baseline to {args.baseline}")
+        sys.exit(0)
+    # compares with the baseline if there is one
+    if (not os.path.exists(args.baseline)):
+        print(f"no baseline at {args.baseline}, run with --save to make one")
+        sys.exit(0)
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if (baseline["lines"] != args.lines):
+        print(f"baseline was made with {baseline['lines']} lines, results may not be comparable")
+    print(f"compared to baseline (threshold {args.threshold:.0%})")
+    regressed = compare(results, baseline["results"], args.threshold)
+    if (regressed):
+        print(f"regressions: {', '.join(regressed)}")
+        sys.exit(1)
@@ -2,16 +2,41 @@
 import re
 # imports sys for error handling
 import sys
+# imports array for compiled code
+from array import array
+# imports os and marshal for the token cache, hashlib is imported when the cache is first used
+import os
+import marshal
+# imports mmap for loading source files
+import mmap
+# imports FunctionType for running python blocks
+from types import FunctionType
+# imports OrderedDict for memoized results and deque for the record of recent execution
+from collections import OrderedDict, deque
+# imports operator and repeat for array operations
+import operator
+from itertools import repeat
+# imports perf_counter for the profiler and the batch runner
+from time import perf_counter
+# imports io for the batch runner, glob and argparse are imported when the batch runner is run
+import io
+# numpy is imported when the first array is made, None if it isn't installed and False until then
+numpy = False
+
+# token type names, the index of a name is its token type code
+typenames = ("ASS", "MAT", "LOG", "INT", "STR", "BOL", "FLO", "LST", "DCT", "PAR", "DOT", "SEP", "SYM", "SLF", "OBJ", "NUL", "KWD", "EQU", "FUN", "REF", "CON", "ERR", "ELI", "python", "color", "audit", "dump", "existing", "ARR", "MDL")
 
 # token types
-ASS, MAT, LOG, INT, STR, BOL, FLO, LST, DCT, PAR, DOT, SEP, SYM, SLF, OBJ, NUL, KWD, EQU, FUN, REF, CON, ERR, ELI = "ASS", "MAT", "LOG", "INT", "STR", "BOL", "FLO", "LST", "DCT", "PAR", "DOT", "SEP", "SYM", "SLF", "OBJ", "NUL", "KWD", "EQU", "FUN", "REF", "CON", "ERR", "ELI"
+ASS, MAT, LOG, INT, STR, BOL, FLO, LST, DCT, PAR, DOT, SEP, SYM, SLF, OBJ, NUL, KWD, EQU, FUN, REF, CON, ERR, ELI, PYC, CLR, AUD, DMP, EXS, ARR, MDL = range(len(typenames))
 
 # stores token data
 class Token ():
+    # tokens only store a type and a value
+    __slots__ = ("type", "value")
     # initializes the token
-    def __init__ (self, type : str, value):
+    def __init__ (self, type : int, value):
         """
-        Token (type : str, value : any) -> Token
+        Token (type : int, value : any) -> Token
 
         tokens can have any type and any value
 
@@ -43,9 +68,21 @@ class Token ():
             REF : reference token
             CON : config token
             ERR : error token
-        
+            ELI : ellipsis token
+            ARR : numeric array token
+            MDL : module token
+
+        types for keyword arguments are:
+            PYC : python code token
+            CLR : color token
+            AUD : audit token
+            DMP : dump token
+            EXS : existing token
+
+        token types are small integers, typenames maps them back to their names
+
         methods:
-            equal (type : str, value : str) -> bool
+            equal (type : int, value : str) -> bool
             deprecated use built in == operator instead
 
             dump () -> str
@@ -56,7 +93,7 @@ class Token ():
         # token value
         self.value = value
     # tests token equality
-    def equal (self, type : str, value) -> bool:
+    def equal (self, type : int, value) -> bool:
         return (self.type == type and self.value == value)
     # dumps value
     def _dumpval (self) -> str:
@@ -64,10 +101,10 @@ class Token ():
         return '"' + str(self.value).replace("\n", "\\n").replace("\x1b", "\\x1b") + '"'
     # dumps token properties
     def dump (self) -> str:
-        return f"({self.type}, {self._dumpval()})"
+        return f"({typenames[self.type]}, {self._dumpval()})"
     # string representation of token
     def __repr__ (self) -> str:
-        return f"({self.type}, {self._dumpval()})"
+        return f"({typenames[self.type]}, {self._dumpval()})"
     # token equality
     def __eq__ (self, comp) -> bool:
         # tests that the comparison is between tokens
@@ -77,6 +114,265 @@ class Token ():
         # returns false if comparison is not between tokens
         return False
 
+# a token that can't be changed, fixed tokens are shared instead of being created for every use
+class FixedToken (Token):
+    __slots__ = ()
+    # initializes the token
+    def __init__ (self, type : int, value):
+        object.__setattr__(self, "type", type)
+        object.__setattr__(self, "value", value)
+    # prevents changes
+    def __setattr__ (self, name : str, value) -> None:
+        raise AttributeError("fixed tokens can't be changed")
+
+# a string token made by concatenation, the parts are only joined when the value is used
+class StrBuilder (Token):
+    __slots__ = ("parts", "size", "text")
+    # initializes the token
+    def __init__ (self, parts : list, size : int):
+        """
+        StrBuilder (parts : list, size : int) -> StrBuilder
+
+        a STR token whose value is the first size strings of parts joined together
+
+        builders made from the same builder share one parts list that is only ever added to, so concatenating to the newest builder doesn't copy anything and older builders keep their value
+
+        properties:
+            parts : the strings that make up the value, may be longer than size if the builder was concatenated to
+
+            size : how many of the parts are in the value
+
+            text : the joined value, None until it is used
+
+        methods:
+            concat (value : str) -> StrBuilder
+            gets a builder for the value with value added to the end
+        """
+        # token type
+        self.type = STR
+        # strings in the value
+        self.parts = parts
+        # number of strings in the value
+        self.size = size
+        # joined value
+        self.text = None
+    # the joined value
+    @property
+    def value (self) -> str:
+        if (self.text is None):
+            self.text = "".join(self.parts if len(self.parts) == self.size else self.parts[:self.size])
+        return self.text
+    # concatenates a string
+    def concat (self, value : str) -> "StrBuilder":
+        # the value has already been joined so it replaces its parts
+        if (self.text is not None):
+            return StrBuilder([self.text, value], 2)
+        parts = self.parts
+        # another builder was made from this one so the parts after this one's can't be changed
+        if (len(parts) != self.size):
+            parts = parts[:self.size]
+        parts.append(value)
+        return StrBuilder(parts, self.size + 1)
+
+# string literals read from a mapped file are only kept as offsets if they are at least this long, a token holding offsets takes more memory than a shorter string
+spanmin = 64
+
+# a string token read from a mapped source file, the value is only decoded from the mapping when it is used
+class SpanToken (Token):
+    __slots__ = ("source", "start", "end")
+    # initializes the token
+    def __init__ (self, source : mmap.mmap, start : int, end : int):
+        """
+        SpanToken (source : mmap.mmap, start : int, end : int) -> SpanToken
+
+        a STR token whose value is the bytes from start to end of source
+
+        properties:
+            source : the mapped source file, None once the value has been decoded
+
+            start : offset of the first byte of the value
+
+            end : offset after the last byte of the value
+        """
+        # token type
+        self.type = STR
+        # where the value is
+        self.source = source
+        self.start = start
+        self.end = end
+    # the decoded value, kept in the token's value slot once it has been decoded
+    @property
+    def value (self) -> str:
+        if (self.source is None):
+            return Token.value.__get__(self)
+        value = self.source[self.start:self.end].decode()
+        Token.value.__set__(self, value)
+        self.source = None
+        return value
+
+# imports numpy for arrays if it is installed
+def _loadnumpy () -> None:
+    global numpy
+    try:
+        import numpy
+    except ImportError:
+        numpy = None
+
+# a numeric array, operators work on every element with one call
+class NumArray ():
+    __slots__ = ("data",)
+    # initializes the array
+    def __init__ (self, data):
+        """
+        NumArray (data : array | numpy.ndarray) -> NumArray
+
+        the value of ARR tokens, arrays use numpy when it is installed and the array module otherwise
+
+        operators work element-wise, operations between an array and a number apply the number to every element and operations between arrays need arrays of the same length
+
+        integer arrays have the typecode "q" and float arrays "d", comparisons give integer arrays of 0 and 1
+
+        properties:
+            data : the elements
+
+        methods:
+            fromvalues (values : list) -> NumArray
+            makes an array from numbers, raises TypeError if a value isn't a number
+        """
+        # elements
+        self.data = data
+    # makes an array from numbers
+    @staticmethod
+    def fromvalues (values : list) -> "NumArray":
+        isfloat = False
+        for value in values:
+            t = type(value)
+            if (t is float):
+                isfloat = True
+            elif (t is not int and t is not bool):
+                raise TypeError("arrays can only hold numbers")
+        # imports numpy when the first array is made since it is slow to import, every array is made here so it is loaded before any operation
+        if (numpy is False):
+            _loadnumpy()
+        if (numpy is not None):
+            return NumArray(numpy.array(values, dtype=numpy.float64 if isfloat else numpy.int64))
+        return NumArray(array("d" if isfloat else "q", values))
+    # does an element-wise operation, typecode is the typecode of the result if it doesn't depend on the operands
+    def _op (self, other, op, reverse : bool = False, typecode : str = None, divides : bool = False) -> "NumArray":
+        data = self.data
+        isarray = other.__class__ is NumArray
+        if (isarray):
+            other = other.data
+            if (len(other) != len(data)):
+                raise TypeError("arrays have different lengths")
+        elif (type(other) not in (int, float, bool)):
+            raise TypeError("arrays can only be used with numbers")
+        if (numpy is not None):
+            # numpy doesn't raise on division by zero
+            if (divides):
+                divisor = data if reverse else other
+                if ((divisor == 0).any() if isarray or reverse else divisor == 0):
+                    raise ZeroDivisionError("division by zero")
+            result = op(other, data) if reverse else op(data, other)
+            return NumArray(result.astype(numpy.int64) if typecode == "q" else result)
+        if (typecode is None):
+            typecode = "d" if data.typecode == "d" or (other.typecode == "d" if isarray else type(other) is float) else "q"
+        other = other if isarray else repeat(other)
+        try:
+            return NumArray(array(typecode, map(op, other, data) if reverse else map(op, data, other)))
+        except OverflowError:
+            raise TypeError("integer too large for an array")
+    # arithmetic
+    def __add__ (self, other):
+        return self._op(other, operator.add)
+    def __radd__ (self, other):
+        return self._op(other, operator.add, True)
+    def __sub__ (self, other):
+        return self._op(other, operator.sub)
+    def __rsub__ (self, other):
+        return self._op(other, operator.sub, True)
+    def __mul__ (self, other):
+        return self._op(other, operator.mul)
+    def __rmul__ (self, other):
+        return self._op(other, operator.mul, True)
+    def __truediv__ (self, other):
+        return self._op(other, operator.truediv, False, "d", True)
+    def __rtruediv__ (self, other):
+        return self._op(other, operator.truediv, True, "d", True)
+    def __mod__ (self, other):
+        return self._op(other, operator.mod, False, None, True)
+    def __rmod__ (self, other):
+        return self._op(other, operator.mod, True, None, True)
+    def __neg__ (self):
+        if (numpy is not None):
+            return NumArray(-self.data)
+        return NumArray(array(self.data.typecode, map(operator.neg, self.data)))
+    # logical operations
+    def __and__ (self, other):
+        return self._op(other, operator.and_)
+    def __rand__ (self, other):
+        return self._op(other, operator.and_, True)
+    def __or__ (self, other):
+        return self._op(other, operator.or_)
+    def __ror__ (self, other):
+        return self._op(other, operator.or_, True)
+    def __xor__ (self, other):
+        return self._op(other, operator.xor)
+    def __rxor__ (self, other):
+        return self._op(other, operator.xor, True)
+    # comparisons, python uses the swapped comparison when the array is on the right
+    def __eq__ (self, other):
+        return self._op(other, operator.eq, False, "q")
+    def __ne__ (self, other):
+        return self._op(other, operator.ne, False, "q")
+    def __lt__ (self, other):
+        return self._op(other, operator.lt, False, "q")
+    def __le__ (self, other):
+        return self._op(other, operator.le, False, "q")
+    def __gt__ (self, other):
+        return self._op(other, operator.gt, False, "q")
+    def __ge__ (self, other):
+        return self._op(other, operator.ge, False, "q")
+    # number of elements
+    def __len__ (self) -> int:
+        return len(self.data)
+    # arrays are true if they have elements
+    def __bool__ (self) -> bool:
+        return len(self.data) > 0
+    # string representation of the array
+    def __repr__ (self) -> str:
+        return "[" + ", ".join(map(str, self.data.tolist())) + "]"
+
+# shared tokens for operators and punctuation, keyed by their text
+optokens = {}
+for op in ("+=", "-=", "*=", "/=", "%=", "="):
+    optokens[op] = FixedToken(ASS, op)
+for op in "+-*/%":
+    optokens[op] = FixedToken(MAT, op)
+for op in ("==", "<=", ">=", "!=", "<", ">"):
+    optokens[op] = FixedToken(EQU, op)
+for op in "!&|^":
+    optokens[op] = FixedToken(LOG, op)
+for op, t in (("{", DCT), ("}", DCT), ("[", LST), ("]", LST), ("(", PAR), (")", PAR), (".", DOT), (",", SEP), (":", SYM)):
+    optokens[op] = FixedToken(t, op)
+
+# shared boolean and null tokens
+TRUE, FALSE, VOID = FixedToken(BOL, True), FixedToken(BOL, False), FixedToken(NUL, None)
+# boolean tokens indexed by value
+booltokens = {True:TRUE, False:FALSE}
+
+# all shared tokens keyed by type and value, keywords are added by the interpreter
+fixedtokens = {(t.type, t.value):t for t in (*optokens.values(), TRUE, FALSE, VOID)}
+
+# gets the shared token for a type and value if there is one
+def maketoken (type : int, value) -> Token:
+    try:
+        t = fixedtokens.get((type, value))
+    except TypeError:
+        # values that can't be hashed aren't shared
+        return Token(type, value)
+    return Token(type, value) if t is None else t
+
 # a variable scope
 class Namespace ():
     # initializes the variable scope
@@ -84,21 +380,29 @@ class Namespace ():
         """
         Namespace (value : dict, parent : NamespaceList) -> Namespace
 
+        gets and sets are plain dict lookups, while auditing is on the NamespaceList changes its scopes to AuditNamespace
+
         properties:
             parent : the namepaces parent NamespaceList
 
             value : the variable map
 
-            audit : flag, tells the Namespace whether to audit variable gets/sets
-
             zavls : stores which audit states will audit any variable if no variables are expicitly set for auditing
 
             auditstate : the auditing policy
 
+            auditmode : which variables are audited, compiled from the audit policy while auditing is on
+
         auditstate can be one of the following values:
             0 : all variables are audited if not given any variables to audit
             1 : audits only variables in self.parent.auditvars
             2 : audits only variables not in self.parent.auditvars
+
+        auditmode can be one of the following values:
+            0 : no variables are audited
+            1 : all variables are audited
+            2 : variables in self.parent.auditset are audited
+            3 : variables not in self.parent.auditset are audited
         """
         # the parent namespace list
         self.parent = parent
@@ -108,45 +412,234 @@ class Namespace ():
         self.zavls = (0,)
         # the current audit policy
         self.auditstate = 0
+        # which variables are audited
+        self.auditmode = 0
     # the variable scope keys
     def keys (self):
         return self.value.keys()
     # string representation of the variable scope
     def __repr__ (self) -> str:
         return str(self.value)
+    # compiles the audit policy into the audit mode
+    def _compileaudit (self) -> None:
+        if (self.auditstate == 2):
+            self.auditmode = 3
+        elif (len(self.parent.auditset) == 0):
+            self.auditmode = 1 if self.auditstate in self.zavls else 0
+        else:
+            self.auditmode = 2
     # gets an item
     def __getitem__ (self, key : str) -> Token:
+        return self.value[key]
+    # sets an item
+    def __setitem__ (self, key : str, value : Token) -> None:
+        # sets the value
+        self.value[key] = value
+        # invalidates the cached value of the name
+        self.parent.cache.pop(key, None)
+
+# a variable scope that audits gets and sets and passes them to get and set hooks
+class AuditNamespace (Namespace):
+    # checks if a get or set of a variable should be audited
+    def _audits (self, key : str) -> bool:
+        mode = self.auditmode
+        # scopes also use this class while get or set hooks are attached, which doesn't turn auditing on
+        return (self.parent._audit and not self.parent.auditing and (mode == 1 or (mode == 2 and key in self.parent.auditset) or (mode == 3 and key not in self.parent.auditset)))
+    # calls the get or set hooks
+    def _hooks (self, hooks : list, key : str, value : Token) -> None:
+        # gets and sets made by the interpreter itself aren't passed to hooks
+        if (not self.parent.auditing):
+            for hook in hooks:
+                hook(key, value)
+    # gets an item
+    def __getitem__ (self, key : str) -> Token:
+        value = self.value[key]
         # checks if the get should be audited
-        if (self.parent.audit and not self.parent.auditing and ((len(self.parent.auditvars) == 0 and self.auditstate in self.zavls) or (key in self.parent.auditvars and self.auditstate != 2) or (self.auditstate == 2 and key not in self.parent.auditvars))):
+        if (self._audits(key)):
             # audits the get
-            print(key, self.value[key], "NAMESPACE GET")
+            self.parent.output.print(key, value, "NAMESPACE GET")
+        self._hooks(self.parent.gethooks, key, value)
         # returns the value
-        return self.value[key]
+        return value
     # sets an item
     def __setitem__ (self, key : str, value : Token) -> None:
         # sets the value
-        self.value[key] = value
+        Namespace.__setitem__(self, key, value)
+        # checks if the set should be audited
+        if (self._audits(key)):
+            # audits the set
+            self.parent.output.print(key, value, "NAMESPACE SET")
+        self._hooks(self.parent.sethooks, key, value)
+
+# a function's local variable scope used by the virtual machine, variables are stored unboxed in slots
+class Frame (Namespace):
+    # frames start with the default audit policy, which is kept on the class so making a frame for each call only sets what differs between frames
+    zavls = (0,)
+    auditstate = 0
+    auditmode = 0
+    # initializes the frame
+    def __init__ (self, names : tuple, parent, index : dict = None, slots : list = None):
+        """
+        Frame (names : tuple, parent : NamespaceList, index : dict = None, slots : list = None) -> Frame
+
+        properties:
+            names : the names of the local variables, the index of a name is its slot
+
+            index : maps names to slots
+
+            slots : unboxed variable values, UNSET if the variable hasn't been set, all variables are unset if slots isn't given
+
+        getting and setting items works the same as with a Namespace, while auditing is on the NamespaceList changes its frames to AuditFrame
+        """
+        # the parent namespace list
+        self.parent = parent
+        # local variable names
+        self.names = names
+        # slots of the names, code shares one index between all of its frames
+        self.index = {names[i]:i for i in range(len(names))} if index is None else index
+        # variable values
+        self.slots = [UNSET] * len(names) if slots is None else slots
+    # the variable map
+    @property
+    def value (self) -> dict:
+        return {self.names[i]:box(self.slots[i]) for i in range(len(self.names)) if self.slots[i] is not UNSET}
+    # the variable scope keys
+    def keys (self):
+        return [self.names[i] for i in range(len(self.names)) if self.slots[i] is not UNSET]
+    # gets an item
+    def __getitem__ (self, key : str) -> Token:
+        value = self.slots[self.index[key]]
+        # unset variables don't exist
+        if (value is UNSET):
+            raise KeyError(key)
+        return box(value)
+    # sets an item
+    def __setitem__ (self, key : str, value : Token) -> None:
+        self.slots[self.index[key]] = unbox(value)
+
+# a function frame that audits gets and sets and passes them to get and set hooks
+class AuditFrame (Frame):
+    # checks if a get or set of a variable should be audited
+    _audits = AuditNamespace._audits
+    # calls the get or set hooks
+    _hooks = AuditNamespace._hooks
+    # gets an item
+    def __getitem__ (self, key : str) -> Token:
+        value = Frame.__getitem__(self, key)
+        # checks if the get should be audited
+        if (self._audits(key)):
+            # audits the get
+            self.parent.output.print(key, value, "NAMESPACE GET")
+        self._hooks(self.parent.gethooks, key, value)
+        return value
+    # sets an item
+    def __setitem__ (self, key : str, value : Token) -> None:
+        # sets the value
+        Frame.__setitem__(self, key, value)
         # checks if the set should be audited
-        if (self.parent.audit and not self.parent.auditing and ((len(self.parent.auditvars) == 0 and self.auditstate in self.zavls) or (key in self.parent.auditvars and self.auditstate != 2) or (self.auditstate == 2 and key not in self.parent.auditvars))):
+        if (self._audits(key)):
             # audits the set
-            print(key, value, "NAMESPACE SET")
+            self.parent.output.print(key, value, "NAMESPACE SET")
+        self._hooks(self.parent.sethooks, key, value)
+
+# audited versions of scope classes
+auditclasses = {Namespace:AuditNamespace, Frame:AuditFrame}
+# unaudited versions of scope classes
+fastclasses = {AuditNamespace:Namespace, AuditFrame:Frame}
+
+# buffered destination of interpreter output
+class Output ():
+    # initializes the output
+    def __init__ (self, stream = None, buffersize : int = 8192):
+        """
+        Output (stream : file = None, buffersize : int = 8192) -> Output
+
+        collects everything the interpreter prints and writes it to the stream in batches
+
+        properties:
+            stream : file object output is written to, if it is None output is written to whatever sys.stdout is when it is flushed
+
+            buffersize : number of characters that are collected before they are written, 0 writes everything right away
+
+            buffer : text that hasn't been written yet
+
+            size : number of characters in buffer
+
+            tty : if the stream is a terminal, colors are only written to terminals
+
+        methods:
+            write (text : str) -> None
+            adds text to the buffer, flushing it if it is full
+
+            print (*values, sep : str = " ", end : str = "\\n") -> None
+            writes values like print does
+
+            flush () -> None
+            writes the buffer to the stream
+        """
+        # output stream
+        self.stream = stream
+        # buffer
+        self.buffersize = buffersize
+        self.buffer = []
+        self.size = 0
+        # checks if the stream is a terminal
+        try:
+            self.tty = (sys.stdout if stream is None else stream).isatty()
+        except (AttributeError, ValueError):
+            self.tty = False
+    # adds text to the buffer
+    def write (self, text : str) -> None:
+        self.buffer.append(text)
+        self.size += len(text)
+        # writes the buffer once it is full
+        if (self.size >= self.buffersize):
+            self.flush()
+    # writes values like print does
+    def print (self, *values, sep : str = " ", end : str = "\n") -> None:
+        self.write(sep.join([str(value) for value in values]) + end)
+    # writes the buffer to the stream
+    def flush (self) -> None:
+        if (len(self.buffer) == 0):
+            return
+        stream = sys.stdout if self.stream is None else self.stream
+        # the buffer is emptied first so a failed write doesn't write the same text again
+        text = "".join(self.buffer)
+        self.buffer.clear()
+        self.size = 0
+        stream.write(text)
+        stream.flush()
 
 # stores namespaces
 class NamespaceList ():
     # initializes the list
-    def __init__ (self, consts : dict):
+    def __init__ (self, consts : dict, output : Output = None):
         """
-        NamespaceList (consts : dict) -> NamespaceList
+        NamespaceList (consts : dict, output : Output = None) -> NamespaceList
 
         stores Namespace objects
 
         properties:
             auditing - wheter an audit event is occuring, suppresses child variable scope auditing
 
+            audit - if child scopes audit variable gets and sets, setting it changes the class of every scope between the plain and the audited versions
+
+            traced - if child scopes use the audited versions of their classes, true while auditing is on or get or set hooks are attached
+
+            gethooks - functions called with the name and value of every variable get
+
+            sethooks - functions called with the name and value of every variable set
+
+            output - where audit messages are written
+
+            module - the module whose globals are the global scope, None while it is the program's
+
             scopes - list of child variable scopes
 
             auditvars - list of variables that should be audited
 
+            auditset - set of variables that should be audited
+
         methods:
             audit_state (index : int, value : int) -> None
             sets the audit policy for a variable scope
@@ -154,577 +647,2259 @@ class NamespaceList ():
             add_audit (vname : str) -> None
             adds vname to list of variables to audit
 
-            remove_audit (vname : str) -> None
-            removes vname from list of variables to audit
+            remove_audit (vname : str) -> None
+            removes vname from list of variables to audit
+
+            new_scope () -> None
+            adds a new variable scope
+
+            push_frame (frame : Frame) -> None
+            adds a function frame as a variable scope
+
+            remove_scope () -> None
+            removes the lowest level scope (can't remove global or constant scopes)
+
+            swap_classes () -> None
+            changes the class of every scope to match traced, called after hooks are attached or removed
+
+            set_module (module : Module) -> Module
+            makes a module's globals the global scope, None makes the program's globals the global scope, returns the module that was replaced
+        """
+        # whether an audit is occuring
+        self.auditing = False
+        # if child scopes should audit variable changes
+        self._audit = False
+        # if child scopes use the audited classes
+        self.traced = False
+        # get and set hooks
+        self.gethooks = []
+        self.sethooks = []
+        # audit output
+        self.output = Output() if output is None else output
+        # variable scopes
+        self.scopes = [Namespace(consts, self), Namespace({}, self)]
+        # variables that should be audited
+        self.auditvars = []
+        # variables that should be audited as a set for fast lookups
+        self.auditset = set()
+        # unboxed values of global and constant variables used by the virtual machine, names are removed when they are set
+        self.cache = {}
+        # the module the global scope belongs to
+        self.module = None
+        # the program's globals, kept while a module's globals are the global scope
+        self.program = (self.scopes[1], self.cache)
+    # if child scopes audit variable gets and sets
+    @property
+    def audit (self) -> bool:
+        return self._audit
+    # turns auditing on or off
+    @audit.setter
+    def audit (self, value : bool) -> None:
+        self._audit = value
+        self.swap_classes()
+    # changes the classes of all scopes between the plain and the audited versions
+    def swap_classes (self) -> None:
+        # scopes are only slowed down while something is watching their gets and sets
+        self.traced = self._audit or len(self.gethooks) > 0 or len(self.sethooks) > 0
+        classes = auditclasses if self.traced else fastclasses
+        for scope in self.scopes:
+            scope.__class__ = classes.get(type(scope), type(scope))
+        self._compileaudits()
+    # changes the global scope to the globals of a module
+    def set_module (self, module : "Module") -> "Module":
+        previous = self.module
+        scope, cache = self.program if module is None else (module.namespace, module.cache)
+        # module globals are shared by every interpreter so they are given to this one and to its tracing, the cache can hold another interpreter's constants so it is emptied
+        if (scope.parent is not self):
+            cache.clear()
+        scope.parent = self
+        scope.__class__ = (auditclasses if self.traced else fastclasses).get(type(scope), type(scope))
+        if (self._audit):
+            scope._compileaudit()
+        self.scopes[1] = scope
+        self.cache = cache
+        self.module = module
+        return previous
+    # compiles the audit policies of all scopes
+    def _compileaudits (self) -> None:
+        if (self._audit):
+            for scope in self.scopes:
+                scope._compileaudit()
+    # sets audit policy for a scope
+    def audit_state (self, index : int, value : int) -> None:
+        # checks that index is valid
+        if (index >= 0 and index < len(self.scopes)):
+            # sets audit policy
+            self.scopes[index].auditstate = value
+            self.scopes[index]._compileaudit()
+    # adds a variable to audit
+    def add_audit (self, vname : str) -> None:
+        # checks that the variable name isn't already in self.auditvars
+        if (vname not in self.auditset):
+            # adds the name to self.auditvars
+            self.auditvars.append(vname)
+            self.auditset.add(vname)
+            self._compileaudits()
+    # removes a variable from auditing
+    def remove_audit (self, vname : str) -> None:
+        # checks that the name is in self.auditvars
+        if (vname in self.auditset):
+            # removes the name from self.auditvars
+            self.auditvars.remove(vname)
+            self.auditset.discard(vname)
+            self._compileaudits()
+    # adds a scope
+    def new_scope (self) -> None:
+        if (self.traced):
+            scope = AuditNamespace({}, self)
+            scope._compileaudit()
+            self.scopes.append(scope)
+        else:
+            self.scopes.append(Namespace({}, self))
+    # adds a frame as a scope
+    def push_frame (self, frame : Frame) -> None:
+        if (self.traced):
+            frame.__class__ = AuditFrame
+            frame._compileaudit()
+        self.scopes.append(frame)
+    # removes a scope
+    def remove_scope (self) -> None:
+        if (len(self.scopes) > 2):
+            self.scopes.pop()
+    # returns string representation of the list
+    def __repr__ (self) -> str:
+        # gets the string representation of all scopes and formats them nicely
+        return "[\n"+",\n".join([str(self.scopes[i]) for i in range(len(self.scopes))])+"\n]"
+    # gets length of list
+    def __len__ (self) -> int:
+        return len(self.scopes)
+    # gets scope
+    def __getitem__ (self, ind : int) -> Namespace:
+        return self.scopes[ind]
+    # sets scope
+    def __setitem__ (self, ind : int, value : Namespace) -> None:
+        self.scopes[ind] = value
+
+# system color palette
+class InterPalette ():
+    # inializes the palette
+    def __init__ (self, enabled : bool = True):
+        """
+        InterPalette (enabled : bool = True) -> InterPalette
+
+        the palette is used to store what colors the system should use when displaying certain types of outputs
+
+        properties:
+            [system colors] : the colors for different type of system output, empty strings while the palette is disabled
+
+            palette : the colors that are used while the palette is enabled
+
+            enabled : if colors are written, setting it changes every system color
+
+            validcolornames : tuple of valid system colors
+        
+        methods:
+            has (attr : str) -> bool
+            returns true if the attr is in self.validcolornames
+        """
+        self.palette = {
+            # when program resets to default color
+            "reset":"\x1b[39m",
+            # color for auditing header
+            "audithead":"\x1b[38;2;200;100;0m",
+            # color for auditing output
+            "audit":"\x1b[38;2;200;100;0m",
+            # color for error output
+            "error":"\x1b[38;2;255;0;0m",
+            # color for warning output
+            "warning":"\x1b[38;2;255;255;0m",
+            # color for normal output
+            "output":"\x1b[38;2;0;100;200m",
+        }
+        # valid color names
+        self.validcolornames = ("reset", "audithead", "audit", "error", "warning", "output")
+        # sets the system colors
+        self.enabled = enabled
+    # if colors are written
+    @property
+    def enabled (self) -> bool:
+        return self._enabled
+    # turns colors on or off
+    @enabled.setter
+    def enabled (self, value : bool) -> None:
+        self._enabled = value
+        for name in self.validcolornames:
+            setattr(self, name, self.palette[name] if value else "")
+    # checks if the given name is a valid color name
+    def has (self, attr : str) -> bool:
+        return (attr in self.validcolornames)
+    # sets a color
+    def __setitem__ (self, key, value):
+        if (key in self.validcolornames):
+            self.palette[key] = value
+            # the color is used once the palette is enabled
+            if (self._enabled):
+                setattr(self, key, value)
+
+# token cache file header, the version must be changed whenever the token format changes
+cachemagic = b"SPPC"
+cacheversion = 6
+
+# a regex that is compiled the first time it is used, so importing this module doesn't compile regexes programs may never need
+class LazyPattern ():
+    # initializes the pattern
+    def __init__ (self, pattern : str, flags : int = 0):
+        """
+        LazyPattern (pattern : str, flags : int = 0) -> LazyPattern
+
+        attributes other than pattern and flags are taken from the compiled regex, the regex is compiled the first time one is used and attributes are kept on the pattern once they are used so later uses are plain lookups
+
+        properties:
+            pattern : the regex source
+
+            flags : the regex flags
+
+            compiled : the compiled regex, None until it is used
+        """
+        # regex source
+        self.pattern = pattern
+        # regex flags
+        self.flags = flags
+        # compiled regex
+        self.compiled = None
+    # gets an attribute of the compiled regex
+    def __getattr__ (self, name : str):
+        if (self.compiled is None):
+            self.compiled = re.compile(self.pattern, self.flags)
+        value = getattr(self.compiled, name)
+        setattr(self, name, value)
+        return value
+
+# regex for checking if a string is a valid ANSI color code
+ansire = LazyPattern("(\\\\x1b\[\d{2,2};\d{1,1};\d{1,3};\d{1,3};\d{1,3}m)|(\\\\x1b\[\d{2,2}m)")
+
+# common color names and their ANSI codes
+commoncolors = {"lime":"\x1b[38;2;0;255;0m","green":"\x1b[38;2;0;200;0m","orange":"\x1b[38;2;200;100;0m","yellow":"\x1b[38;2;255;255;0m","red":"\x1b[38;2;255;0;0m"}
+
+# master regex for the lexer, the alternatives are tried in order and the name of the one that matched tells the lexer what it found
+lexre = LazyPattern(r"""
+ (?P<skip>[ \t]+)
+|(?P<brk>[\s;]+)
+|(?P<comment>//)
+|(?P<string>"(?:.*?)(?<!\\)")
+|(?P<quote>")
+|(?P<number>\d+(?:\.(?!\.|[^\W\d_])\d*)?)
+|(?P<name>\w+)
+|(?P<assign>[-+*/%]=)
+|(?P<math>[-+*/%])
+|(?P<equal>==|[<>!]=|[<>])
+|(?P<ass>=)
+|(?P<logic>[!&|^])
+|(?P<punct>[{}\[\]().,:])
+|(?P<other>.)
+""", re.S | re.X)
+
+# regex for finding curly brackets
+bracere = LazyPattern("[{}]")
+
+
+# node type names, the index of a name is its node type code
+nodenames = ("CST", "VAR", "BIN", "CMP", "LGC", "UNA", "CAL", "SET", "DEF", "RET", "KEY", "CFG", "LIT", "IMP", "ATR")
+
+# node types
+CST, VAR, BIN, CMP, LGC, UNA, CAL, SET, DEF, RET, KEY, CFG, LIT, IMP, ATR = range(len(nodenames))
+
+# a node of a parsed program
+class Node ():
+    # nodes only store a type, a value, their child nodes and the line they start on
+    __slots__ = ("type", "value", "args", "line")
+    # initializes the node
+    def __init__ (self, type : int, value, args : tuple = (), line : int = 0):
+        """
+        Node (type : int, value : any, args : tuple = (), line : int = 0) -> Node
+
+        properties:
+            type : node type
+
+            value : node value
+
+            args : child nodes
+
+            line : source line of statement nodes, 0 if it isn't known
+
+        node types are:
+            CST : constant, value is the constant's token
+            VAR : variable, value is the variable's reference token
+            BIN : mathmatical operation, value is the operator token, args are the operands
+            CMP : comparison, value is the operator, args are the operands
+            LGC : logical operation, value is the operator, args are the operands
+            UNA : unary operation, value is the operator, args is the operand
+            CAL : function call, value is the called node, args are the arguments
+            SET : assignment, value is the variable name, args is the assigned value
+            DEF : function definition, value is the function name and function token
+            RET : return, args is the returned value if there is one
+            KEY : keyword statement, value is the keyword, args are the keyword's argument tokens
+            CFG : system flag, value is the config token's value
+            LIT : array literal, args are the elements
+            IMP : import, value is the module name, import statements are parsed into an assignment of an import to the module name
+            ATR : module attribute, value is the attribute name, args is the module
+
+        methods:
+            dump (indent : int = 0) -> str
+            dumps the node and its children
+        """
+        # node type
+        self.type = type
+        # node value
+        self.value = value
+        # child nodes
+        self.args = args
+        # source line
+        self.line = line
+    # dumps the node and its children
+    def dump (self, indent : int = 0) -> str:
+        value = self.value.dump() if isinstance(self.value, (Token, Node)) else repr(self.value)
+        out = "    " * indent + f"({nodenames[self.type]}, {value})"
+        for arg in self.args:
+            out += "\n" + (arg.dump(indent + 1) if isinstance(arg, Node) else "    " * (indent + 1) + arg.dump())
+        return out
+    # string representation of the node
+    def __repr__ (self) -> str:
+        return self.dump()
+
+# events hooks can be attached to
+hookevents = ("statement", "call", "return", "get", "set", "error")
+
+# token types that can start an expression
+exptypes = (INT, FLO, STR, BOL, NUL, REF, PAR, MAT, LOG, LST)
+
+# parses tokens into nodes
+class Parser ():
+    # initializes the parser
+    def __init__ (self, tokens : list, lines = None, module : "Module" = None):
+        """
+        Parser (tokens : list, lines : array = None, module : Module = None) -> Parser
+
+        builds nodes from a list of tokens, statements are parsed with parse and single expressions with expression
+
+        properties:
+            tokens : the tokens being parsed
+
+            lines : the source line of each token, statements are given the line of their first token if it is given
+
+            i : index of the next token
+
+        methods:
+            parse () -> list
+            parses all tokens into a list of statement nodes
+
+            expression () -> Node
+            parses the next expression
+        """
+        # tokens being parsed
+        self.tokens = tokens
+        # token lines
+        self.lines = lines
+        # the module the tokens are from, None for the program
+        self.module = module
+        # index of the next token
+        self.i = 0
+    # gets the next token without consuming it
+    def peek (self, offset : int = 0):
+        i = self.i + offset
+        return self.tokens[i] if i < len(self.tokens) else None
+    # consumes the next token
+    def advance (self) -> Token:
+        token = self.peek()
+        if (token is None):
+            # code ended in the middle of a statement
+            raise Exception(10)
+        self.i += 1
+        return token
+    # consumes the next token, checking that it is the given token
+    def expect (self, type : int, value) -> Token:
+        token = self.advance()
+        if (token.type != type or token.value != value):
+            # unexpected token
+            raise Exception(10)
+        return token
+    # checks if the next token has the given type and value
+    def at (self, type : int, value = None) -> bool:
+        token = self.peek()
+        return token is not None and token.type == type and (value is None or token.value == value)
+    # parses all tokens into statements
+    def parse (self) -> list:
+        nodes = []
+        lines = self.lines
+        while self.i < len(self.tokens):
+            start = self.i
+            node = self.statement()
+            if (node is not None):
+                if (lines is not None):
+                    node.line = lines[start]
+                nodes.append(node)
+        return nodes
+    # parses a statement, returns None for tokens that don't do anything
+    def statement (self):
+        token = self.advance()
+        # keyword statements
+        if (token.type == KWD):
+            return self.keyword(token.value)
+        # system flags
+        if (token.type == CON):
+            return Node(CFG, token.value)
+        # assignment
+        if (token.type == REF and self.at(ASS)):
+            op = self.advance().value
+            value = self.expression()
+            # expands assignment operators
+            if (op != "="):
+                value = Node(BIN, optokens[op[0]], (Node(VAR, token), value))
+            return Node(SET, token.value, (value,))
+        # expression statement
+        if (token.type in exptypes):
+            self.i -= 1
+            return self.expression()
+        # tokens that can't start a statement are skipped
+        return None
+    # parses a keyword statement
+    def keyword (self, keyword : str):
+        # function definition
+        if (keyword == "func"):
+            return self.function()
+        # return
+        if (keyword == "return"):
+            token = self.peek()
+            if (token is not None and token.type in exptypes):
+                return Node(RET, None, (self.expression(),))
+            return Node(RET, None)
+        # python code
+        if (keyword == "python"):
+            if (self.at(PYC)):
+                return Node(KEY, keyword, (self.advance(),))
+            return Node(KEY, keyword)
+        # color takes two arguments
+        if (keyword == "color"):
+            if (self.at(CLR) and self.peek(1) is not None and self.peek(1).type == CLR):
+                return Node(KEY, keyword, (self.advance(), self.advance()))
+            return None
+        # keywords with an optional argument
+        if (keyword in ("audit", "dump", "existing")):
+            argtype = {"audit":AUD, "dump":DMP, "existing":EXS}[keyword]
+            if (self.at(argtype)):
+                return Node(KEY, keyword, (self.advance(),))
+            # dump and existing don't do anything without an argument
+            return Node(KEY, keyword) if keyword == "audit" else None
+        # imports are assignments of the module to its name
+        if (keyword == "import"):
+            name = self.advance()
+            if (name.type != REF):
+                raise Exception(10)
+            return Node(SET, name.value, (Node(IMP, name.value),))
+        # other keywords don't do anything yet
+        return None
+    # parses a function definition
+    def function (self) -> Node:
+        # index of the function name
+        first = self.i
+        # gets function name
+        name = self.advance()
+        if (name.type != REF):
+            raise Exception(10)
+        self.expect(PAR, "(")
+        # args
+        args = []
+        # building args
+        build = []
+        # bracket depth
+        depth = 1
+        while True:
+            token = self.advance()
+            if (token.type == PAR):
+                depth += 1 if token.value == "(" else -1
+                # final closing parenthesis
+                if (depth == 0):
+                    if (len(build) > 0 or len(args) > 0):
+                        args.append(tuple(build))
+                    break
+            # new argument
+            if (token.type == SEP and depth == 1):
+                args.append(tuple(build))
+                build = []
+                continue
+            build.append(token)
+        self.expect(DCT, "{")
+        # index of the first body token
+        start = self.i
+        # body
+        ftoks = []
+        depth = 1
+        while True:
+            token = self.advance()
+            if (token.type == DCT):
+                depth += 1 if token.value == "{" else -1
+                # final closing bracket
+                if (depth == 0):
+                    break
+            ftoks.append(token)
+        # the body keeps the lines of its tokens so its statements know their lines when it is parsed
+        lines = self.lines
+        func = Function(tuple(args), tuple(ftoks), name.value, 0 if lines is None else lines[first], None if lines is None else lines[start:self.i-1], self.module)
+        return Node(DEF, (name.value, Token(FUN, func)))
+    # parses an expression
+    def expression (self) -> Node:
+        return self.logical()
+    # parses logical operations
+    def logical (self) -> Node:
+        node = self.comparison()
+        while self.at(LOG) and self.peek().value != "!":
+            op = self.advance().value
+            node = Node(LGC, op, (node, self.comparison()))
+        return node
+    # parses comparisons
+    def comparison (self) -> Node:
+        node = self.additive()
+        while self.at(EQU):
+            op = self.advance().value
+            node = Node(CMP, op, (node, self.additive()))
+        return node
+    # parses addition and subtraction
+    def additive (self) -> Node:
+        node = self.multiplicative()
+        while self.at(MAT) and self.peek().value in "+-":
+            op = self.advance()
+            node = Node(BIN, op, (node, self.multiplicative()))
+        return node
+    # parses multiplication, division and modulo
+    def multiplicative (self) -> Node:
+        node = self.unary()
+        while self.at(MAT) and self.peek().value in "*/%":
+            op = self.advance()
+            node = Node(BIN, op, (node, self.unary()))
+        return node
+    # parses negation and logical not
+    def unary (self) -> Node:
+        if (self.at(MAT, "-") or self.at(LOG, "!")):
+            op = self.advance().value
+            return Node(UNA, op, (self.unary(),))
+        return self.primary()
+    # parses values, variables, calls and parenthesized expressions
+    def primary (self) -> Node:
+        token = self.advance()
+        # tokens read from a mapped file are decoded here so nodes hold plain tokens
+        if (token.__class__ is SpanToken):
+            token = Token(token.type, token.value)
+        if (token.type in (INT, FLO, STR, BOL, NUL)):
+            return Node(CST, token)
+        if (token.type == REF):
+            node = Node(VAR, token)
+            # function calls and module attributes
+            while self.at(PAR, "(") or self.at(DOT):
+                if (self.at(DOT)):
+                    self.advance()
+                    name = self.advance()
+                    if (name.type != REF):
+                        raise Exception(10)
+                    node = Node(ATR, name.value, (node,))
+                else:
+                    node = Node(CAL, node, self.arguments())
+            return node
+        if (token.type == PAR and token.value == "("):
+            node = self.expression()
+            self.expect(PAR, ")")
+            return node
+        # array literals
+        if (token.type == LST and token.value == "["):
+            return Node(LIT, None, self.elements())
+        # token can't start an expression
+        raise Exception(10)
+    # parses the elements of an array literal after its opening bracket
+    def elements (self) -> tuple:
+        args = []
+        if (self.at(LST, "]")):
+            self.advance()
+            return ()
+        while True:
+            args.append(self.expression())
+            if (self.at(SEP)):
+                self.advance()
+                continue
+            self.expect(LST, "]")
+            return tuple(args)
+    # parses the arguments of a function call
+    def arguments (self) -> tuple:
+        self.expect(PAR, "(")
+        args = []
+        if (self.at(PAR, ")")):
+            self.advance()
+            return ()
+        while True:
+            # empty argument
+            if (self.at(SEP) or self.at(PAR, ")")):
+                raise Exception(8)
+            args.append(self.expression())
+            if (self.at(SEP)):
+                self.advance()
+                continue
+            self.expect(PAR, ")")
+            return tuple(args)
+
+
+# opcode names, the index of a name is its opcode
+opnames = ("LOADC", "LOADL", "LOADG", "STOREL", "STOREG", "POP", "ADD", "SUB", "MUL", "DIV", "MOD", "EQ", "NE", "LT", "LE", "GT", "GE", "AND", "OR", "XOR", "NOT", "NEG", "CALL", "RETURN", "RETV", "KEYWORD", "FLAG", "APPENDL", "APPENDG", "LOADS", "ARRAY", "LINE", "IMPORT", "ATTR", "LOADB", "ADDC", "SUBC", "MULC", "DIVC", "MODC")
+
+# opcodes
+LOADC, LOADL, LOADG, STOREL, STOREG, POP, ADD, SUB, MUL, DIV, MOD, EQ, NE, LT, LE, GT, GE, AND, OR, XOR, NOT, NEG, CALL, RETURN, RETV, KEYWORD, FLAG, APPENDL, APPENDG, LOADS, ARRAY, LINE, IMPORT, ATTR, LOADB, ADDC, SUBC, MULC, DIVC, MODC = range(len(opnames))
+
+# opcodes of operators
+binops = {"+":ADD, "-":SUB, "*":MUL, "/":DIV, "%":MOD}
+# opcodes of operators whose right operand is a constant, the constant is their argument so it isn't loaded by its own instruction
+constops = {"+":ADDC, "-":SUBC, "*":MULC, "/":DIVC, "%":MODC}
+cmpops = {"==":EQ, "!=":NE, "<":LT, "<=":LE, ">":GT, ">=":GE}
+logops = {"&":AND, "|":OR, "^":XOR}
+
+# python functions of comparisons keyed by their operator and opcode, used for element-wise array comparisons
+cmpfuncs = {"==":operator.eq, "!=":operator.ne, "<":operator.lt, "<=":operator.le, ">":operator.gt, ">=":operator.ge}
+cmpfuncs.update({cmpops[op]:cmpfuncs[op] for op in cmpops})
+
+# token types of unboxed python values
+boxtypes = {int:INT, float:FLO, str:STR, bool:BOL, NumArray:ARR}
+
+# returned by the virtual machine when code finishes without a return statement
+NORET = object()
+
+# value of local variable slots that haven't been set
+UNSET = object()
+
+# converts a token to the value the virtual machine works with
+def unbox (token : Token):
+    t = token.type
+    if (t == STR or t == INT or t == FLO or t == BOL or t == NUL or t == ARR):
+        return token.value
+    # other tokens are used as they are
+    return token
+
+# converts a value from the virtual machine back to a token
+def box (value) -> Token:
+    t = boxtypes.get(type(value))
+    if (t is None):
+        return VOID if value is None else value
+    if (t == STR):
+        return Token(STR, value)
+    if (t == BOL):
+        return booltokens[value]
+    return Token(t, value)
+
+# concatenates a value to an unboxed value or a StrBuilder, concatenated strings give a StrBuilder
+def concat (base, value):
+    if (base.__class__ is StrBuilder):
+        if (type(value) is not str):
+            raise TypeError("can only concatenate strings")
+        return base.concat(value)
+    if (type(base) is str and type(value) is str):
+        return StrBuilder([base, value], 2)
+    return base + value
+
+# checks if evaluating an expression can only read variables and call pure functions, bound is the names it can read, None if it can read any, name is the function it is in, which is taken to be pure
+def pureexp (node : Node, bound : set = None, name : str = None) -> bool:
+    t = node.type
+    if (t == CST):
+        return True
+    if (t == VAR):
+        return bound is None or node.value.value in bound
+    # modules can change
+    if (t == IMP or t == ATR):
+        return False
+    if (t == CAL):
+        func = node.value
+        # functions can call themselves by the name they were defined with
+        if (name is not None and func.type == VAR and func.value.value == name and (bound is None or name not in bound)):
+            pass
+        # constant functions
+        elif (not (func.type == CST and func.value.type == FUN and func.value.value.getpure())):
+            return False
+    return all(pureexp(arg, bound, name) for arg in node.args)
+
+# compiled code
+class Code ():
+    # code only stores its instructions, constants, names, lines and the layout of its arguments
+    __slots__ = ("ops", "instrs", "consts", "names", "varnames", "varindex", "lines", "params", "argfills")
+    # initializes the code
+    def __init__ (self, ops : array, consts : tuple, names : tuple, varnames : tuple = (), lines : tuple = ()):
+        """
+        Code (ops : array, consts : tuple, names : tuple, varnames : tuple = (), lines : tuple = ()) -> Code
+
+        properties:
+            ops : instructions, each instruction is an opcode followed by its argument
+
+            instrs : (index, opcode, argument) for each instruction, the form the virtual machine runs
+
+            consts : constant pool, values are unboxed
+
+            names : global and constant variable names, module names and attribute names the code uses
+
+            varnames : local variable names, the index of a name is its slot in the function's frame
+
+            varindex : maps local variable names to their slots
+
+            lines : (instruction index, line) pairs for the first instruction of each statement with a known line
+
+            params : (slot, default, varargs) for each argument of the function the code is the body of, default is UNSET for required arguments, a node for defaults evaluated on each call and the unboxed value for constant defaults
+
+            argfills : maps the numbers of arguments calls can copy straight into a new frame to the slots that follow the arguments, which are constant defaults and unset local variables
+
+        methods:
+            bindparams (params : tuple) -> None
+            sets the argument layout from the parsed arguments of a function
+
+            dump () -> str
+            disassembles the code and the code of the functions it defines
+
+            getline (pc : int) -> int
+            gets the line of the instruction at index pc, 0 if it isn't known
+        """
+        # instructions
+        self.ops = ops
+        # instructions decoded once so running them doesn't pair up opcodes and arguments each time
+        self.instrs = tuple(zip(range(0, len(ops), 2), ops[::2], ops[1::2]))
+        # constant pool
+        self.consts = consts
+        # global names used by the code
+        self.names = names
+        # local variable names
+        self.varnames = varnames
+        # slots of local variables
+        self.varindex = {varnames[i]:i for i in range(len(varnames))}
+        # statement lines
+        self.lines = lines
+        # argument layout, code that isn't a function body has no arguments
+        self.params = ()
+        self.argfills = {}
+    # sets the argument layout once so calls don't look up the slots of arguments or evaluate constant defaults
+    def bindparams (self, params : tuple) -> None:
+        layout = []
+        for name, default, varargs in params:
+            # constant defaults are unboxed here, other defaults are evaluated when they are used
+            if (default is None):
+                default = UNSET
+            elif (default.type == CST):
+                default = unbox(default.value)
+            layout.append((self.varindex[name], default, varargs))
+        self.params = tuple(layout)
+        # arguments can only be copied straight into a frame if each has the slot of its position and none takes variable arguments
+        if (not all(slot == i and not varargs for i, (slot, default, varargs) in enumerate(layout))):
+            return
+        fill = [UNSET] * (len(self.varnames) - len(layout))
+        self.argfills[len(layout)] = fill
+        # each argument left out adds its default to the slots that follow the arguments
+        for n in range(len(layout) - 1, -1, -1):
+            default = layout[n][1]
+            # calls that leave out a required argument or one whose default has to be evaluated take the slower path
+            if (default is UNSET or default.__class__ is Node):
+                break
+            fill = [default] + fill
+            self.argfills[n] = fill
+    # gets the line of an instruction, only used after errors so the lines are searched in order
+    def getline (self, pc : int) -> int:
+        line = 0
+        for start, n in self.lines:
+            if (start > pc):
+                break
+            line = n
+        return line
+    # string representation of the code
+    def __repr__ (self) -> str:
+        return "<bytecode>"
+    # disassembles the code
+    def dump (self, title : str = "<program>") -> str:
+        out = [f"code {title}:"]
+        # nested function code
+        funcs = []
+        for pc in range(0, len(self.ops), 2):
+            op, arg = self.ops[pc], self.ops[pc+1]
+            # gets a readable version of the argument
+            if (op == LOADC or op == KEYWORD or op == FLAG or op >= ADDC):
+                value = self.consts[arg]
+                if (isinstance(value, Token) and value.type == FUN and value.value.code is not None):
+                    funcs.append(value.value.code)
+                desc = f"{arg} ({typenames[value.type] if isinstance(value, Token) else repr(value)})"
+            elif (op == LOADG or op == STOREG or op == APPENDG or op == LOADB or op == IMPORT or op == ATTR):
+                desc = f"{arg} ({self.names[arg]})"
+            elif (op == LOADL or op == STOREL or op == APPENDL or op == LOADS):
+                desc = f"{arg} ({self.varnames[arg]})"
+            elif (op == CALL or op == ARRAY or op == LINE):
+                desc = str(arg)
+            else:
+                desc = ""
+            out.append(f"\t{pc:>5} {opnames[op]:<8} {desc}".rstrip())
+        for code in funcs:
+            out.append(code.dump("<function>"))
+        return "\n".join(out)
+
+# compiles nodes into code for the virtual machine
+class Compiler ():
+    # initializes the compiler
+    def __init__ (self, varnames : tuple = (), lines : bool = False):
+        """
+        Compiler (varnames : tuple = (), lines : bool = False) -> Compiler
+
+        compiles parsed nodes into Code objects
+
+        names are resolved when they are compiled, names in varnames are local variables stored in slots of the function's frame and all other names are global or constant variables
+
+        assignments that add to the variable being assigned, like the ones += is parsed into, are compiled to append instructions that keep strings in a StrBuilder, global variables that are appended to are loaded with LOADB before the added value like the tree walker reads them, local variables that are appended to are loaded with LOADS which joins the builder
+
+        if lines is true a LINE instruction is put before each statement so statement hooks can be called and the profiler can time lines, functions defined by the code are compiled with lines too
+
+        methods:
+            compile (nodes : list, function : bool = False) -> Code
+            compiles statement nodes, function code always ends by returning void
+        """
+        # instructions
+        self.ops = array("I")
+        # constant pool
+        self.consts = []
+        # indexes of constants that can be shared
+        self.constindex = {}
+        # global names
+        self.names = []
+        # indexes of global names
+        self.nameindex = {}
+        # local variable names
+        self.varnames = varnames
+        # slots of local variables
+        self.varindex = {varnames[i]:i for i in range(len(varnames))}
+        # local variables that are appended to
+        self.appended = set()
+        # if statements are marked with their lines
+        self.lines = lines
+        # the first instruction of each statement and its line
+        self.linetable = []
+    # adds an instruction
+    def emit (self, op : int, arg : int = 0) -> None:
+        self.ops.append(op)
+        self.ops.append(arg)
+    # gets the index of a constant in the constant pool
+    def const (self, value) -> int:
+        # tokens and other unhashable values aren't shared
+        key = (type(value), value) if type(value) in (int, float, str, bool) or value is None else None
+        if (key is not None and key in self.constindex):
+            return self.constindex[key]
+        self.consts.append(value)
+        if (key is not None):
+            self.constindex[key] = len(self.consts) - 1
+        return len(self.consts) - 1
+    # gets the index of a global name
+    def name (self, name : str) -> int:
+        if (name not in self.nameindex):
+            self.names.append(name)
+            self.nameindex[name] = len(self.names) - 1
+        return self.nameindex[name]
+    # emits a load or store of a name, resolving it to a local slot or a global name
+    def variable (self, name : str, store : bool) -> None:
+        if (name in self.varindex):
+            self.emit(STOREL if store else LOADS if name in self.appended else LOADL, self.varindex[name])
+        else:
+            self.emit(STOREG if store else LOADG, self.name(name))
+    # compiles statements
+    def compile (self, nodes : list, function : bool = False) -> Code:
+        # finds the local variables that are appended to so that all of their loads join the builder
+        for node in nodes:
+            if (self.isappend(node) and node.value in self.varindex):
+                self.appended.add(node.value)
+        for node in nodes:
+            self.statement(node)
+        # functions return void if they don't return anything
+        if (function):
+            self.emit(RETV)
+        return Code(self.ops, tuple(self.consts), tuple(self.names), self.varnames, tuple(self.linetable))
+    # checks if a statement adds to the variable it assigns to
+    def isappend (self, node : Node) -> bool:
+        if (node.type != SET):
+            return False
+        value = node.args[0]
+        return (value.type == BIN and value.value.value == "+" and value.args[0].type == VAR and value.args[0].value.value == node.value)
+    # compiles a statement
+    def statement (self, node : Node) -> None:
+        t = node.type
+        # records the statement's line for errors
+        if (node.line):
+            self.linetable.append((len(self.ops), node.line))
+        # marks the start of the statement's line for statement hooks and the profiler
+        if (self.lines and node.line):
+            self.emit(LINE, node.line)
+        # appending assignment
+        if (t == SET and self.isappend(node)):
+            if (node.value in self.varindex):
+                self.expression(node.args[0].args[1])
+                self.emit(APPENDL, self.varindex[node.value])
+            else:
+                # globals can be changed by the added value so they are read first
+                self.emit(LOADB, self.name(node.value))
+                self.expression(node.args[0].args[1])
+                self.emit(APPENDG, self.name(node.value))
+        # assignment
+        elif (t == SET):
+            self.expression(node.args[0])
+            self.variable(node.value, True)
+        # return
+        elif (t == RET):
+            if (len(node.args) > 0):
+                self.expression(node.args[0])
+                self.emit(RETURN)
+            else:
+                self.emit(RETV)
+        # function definition, the body is compiled once with the function
+        elif (t == DEF):
+            name, func = node.value
+            # compiles the body once with the function
+            func.value.getcode(self.lines)
+            self.emit(LOADC, self.const(func))
+            self.variable(name, True)
+        # keyword statements
+        elif (t == KEY):
+            self.emit(KEYWORD, self.const((node.value, node.args)))
+        # system flags
+        elif (t == CFG):
+            self.emit(FLAG, self.const(node.value))
+        # expression statement
+        else:
+            self.expression(node)
+            self.emit(POP)
+    # compiles an expression
+    def expression (self, node : Node) -> None:
+        t = node.type
+        if (t == CST):
+            self.emit(LOADC, self.const(unbox(node.value)))
+        elif (t == VAR):
+            self.variable(node.value.value, False)
+        elif (t == BIN):
+            self.expression(node.args[0])
+            # constant right operands are given to the operator
+            if (node.args[1].type == CST):
+                self.emit(constops[node.value.value], self.const(unbox(node.args[1].value)))
+            else:
+                self.expression(node.args[1])
+                self.emit(binops[node.value.value])
+        elif (t == CMP):
+            self.expression(node.args[0])
+            self.expression(node.args[1])
+            self.emit(cmpops[node.value])
+        elif (t == LGC):
+            self.expression(node.args[0])
+            self.expression(node.args[1])
+            self.emit(logops[node.value])
+        elif (t == UNA):
+            self.expression(node.args[0])
+            self.emit(NOT if node.value == "!" else NEG)
+        elif (t == CAL):
+            self.expression(node.value)
+            for arg in node.args:
+                self.expression(arg)
+            self.emit(CALL, len(node.args))
+        elif (t == LIT):
+            for arg in node.args:
+                self.expression(arg)
+            self.emit(ARRAY, len(node.args))
+        elif (t == IMP):
+            self.emit(IMPORT, self.name(node.value))
+        elif (t == ATR):
+            self.expression(node.args[0])
+            self.emit(ATTR, self.name(node.value))
+        else:
+            # statements don't have values
+            raise Exception(10)
+
+# results of earlier calls to a pure function
+class Memo ():
+    __slots__ = ("cache", "hits", "misses")
+    # initializes the memo
+    def __init__ (self):
+        """
+        Memo () -> Memo
+
+        maps the arguments of calls to their results, when it is full the least recently used result is removed
+
+        properties:
+            cache : results keyed by arguments, ordered from least to most recently used
+
+            hits : number of calls that were found in the cache
+
+            misses : number of calls that weren't found in the cache
+
+        methods:
+            get (key : tuple) -> any
+            gets the result for the arguments, UNSET if there isn't one
+
+            put (key : tuple, value : any, size : int) -> None
+            stores the result for the arguments, keeping at most size results
+
+            resize (size : int) -> None
+            removes the least recently used results until there are at most size
+        """
+        # results keyed by arguments
+        self.cache = OrderedDict()
+        # counters
+        self.hits = 0
+        self.misses = 0
+    # gets a result
+    def get (self, key : tuple):
+        try:
+            value = self.cache[key]
+        except KeyError:
+            self.misses += 1
+            return UNSET
+        except TypeError:
+            # arguments that can't be hashed aren't memoized
+            return UNSET
+        self.hits += 1
+        self.cache.move_to_end(key)
+        return value
+    # stores a result
+    def put (self, key : tuple, value, size : int) -> None:
+        try:
+            self.cache[key] = value
+        except TypeError:
+            # arguments that can't be hashed aren't memoized
+            return
+        self.resize(size)
+    # removes the least recently used results
+    def resize (self, size : int) -> None:
+        while (len(self.cache) > size):
+            self.cache.popitem(last=False)
+
+# a user defined function
+class Function ():
+    # functions store their source tokens and the forms they are compiled to
+    __slots__ = ("args", "body", "name", "line", "lines", "module", "params", "nodes", "code", "pure", "memo")
+    # initializes the function
+    def __init__ (self, args : tuple, body : tuple, name : str = None, line : int = 0, lines = None, module : "Module" = None):
+        """
+        Function (args : tuple, body : tuple, name : str = None, line : int = 0, lines : array = None, module : Module = None) -> Function
+
+        the value of FUN tokens, indexing it gives the argument and body tokens
+
+        the body is parsed and compiled the first time it is needed and kept for all later calls
+
+        properties:
+            args : tuple of token tuples, one for each argument
+
+            body : body tokens
+
+            name : the name the function was defined with
+
+            line : the line the function was defined on, 0 if it isn't known
+
+            lines : the source line of each body token if they are known
+
+            module : the module the function was defined in, its globals are the global scope while the function runs, None for the program
+
+            params : the argument names, default value nodes and whether they are variable arguments
+
+            nodes : the parsed body
+
+            code : the compiled body
+
+            pure : whether the function is pure
+
+            memo : the results of earlier calls if the function is pure and has been called
+
+        functions are pure if their result only depends on their arguments, they can't read variables they didn't set, call functions other than themselves or pure constant functions, define functions, import modules, or use keywords and flags
+
+        methods:
+            getparams () -> tuple
+            gets the parsed arguments
+
+            getnodes () -> list
+            gets the parsed body
+
+            getcode (lines : bool = False) -> Code
+            gets the compiled body, lines is only used when the body is compiled for the first time
+
+            getvarnames () -> tuple
+            gets the names of the local variables of the compiled body
+
+            getpure () -> bool
+            checks if the function is pure
+        """
+        # argument tokens
+        self.args = args
+        # body tokens
+        self.body = body
+        # function name
+        self.name = name
+        # source lines
+        self.line = line
+        self.lines = lines
+        # defining module
+        self.module = module
+        # parsed arguments
+        self.params = None
+        # parsed body
+        self.nodes = None
+        # compiled body
+        self.code = None
+        # if the function is pure
+        self.pure = None
+        # memoized results
+        self.memo = None
+    # gets the parsed arguments
+    def getparams (self) -> tuple:
+        if (self.params is None):
+            params = []
+            for arg in self.args:
+                # variable arguments
+                if (arg[0].type == ELI):
+                    params.append((arg[1].value, None, True))
+                # arguments with a default value
+                elif (optokens["="] in arg):
+                    params.append((arg[0].value, Parser(list(arg[arg.index(optokens["="])+1:])).expression(), False))
+                else:
+                    params.append((arg[0].value, None, False))
+            self.params = tuple(params)
+        return self.params
+    # gets the parsed body
+    def getnodes (self) -> list:
+        if (self.nodes is None):
+            self.nodes = Parser(list(self.body), self.lines, self.module).parse()
+        return self.nodes
+    # gets the compiled body
+    def getcode (self, lines : bool = False) -> Code:
+        if (self.code is None):
+            code = Compiler(self.getvarnames(), lines).compile(self.getnodes(), True)
+            code.bindparams(self.getparams())
+            self.code = code
+        return self.code
+    # gets the names of the function's local variables, arguments come first followed by names the body assigns to
+    def getvarnames (self) -> tuple:
+        names = [param[0] for param in self.getparams()]
+        for node in self.getnodes():
+            name = node.value if node.type == SET else node.value[0] if node.type == DEF else None
+            if (name is not None and name not in names):
+                names.append(name)
+        return tuple(names)
+    # checks if the function is pure
+    def getpure (self) -> bool:
+        if (self.pure is None):
+            # names the function has set
+            bound = set()
+            pure = True
+            for name, default, varargs in self.getparams():
+                if (default is not None and not self._pureexp(default, bound)):
+                    pure = False
+                bound.add(name)
+            for node in self.getnodes():
+                if (not pure):
+                    break
+                t = node.type
+                if (t == SET):
+                    pure = self._pureexp(node.args[0], bound)
+                    bound.add(node.value)
+                elif (t == DEF or t == KEY or t == CFG):
+                    pure = False
+                elif (t == RET):
+                    pure = all(self._pureexp(arg, bound) for arg in node.args)
+                else:
+                    pure = self._pureexp(node, bound)
+            self.pure = pure
+        return self.pure
+    # checks if an expression only uses the given names
+    def _pureexp (self, node : Node, bound : set) -> bool:
+        return pureexp(node, bound, self.name)
+    # gets the argument or body tokens
+    def __getitem__ (self, index : int) -> tuple:
+        return (self.args, self.body)[index]
+    # number of items when indexed
+    def __len__ (self) -> int:
+        return 2
+    # string representation of the function
+    def __repr__ (self) -> str:
+        return repr((self.args, self.body))
+
+# times functions and lines while profiling is on
+class Profiler ():
+    # initializes the profiler
+    def __init__ (self, filename : str = "<program>"):
+        """
+        Profiler (filename : str = "<program>") -> Profiler
+
+        records the calls, cumulative time and self time of functions and the runs and time of lines, line times include the time of the calls made on the line
+
+        functions are keyed like python's profiler keys them, by file, line and name, so stats can be read by pstats and other python profile viewers, the program itself is the function (filename, 0, "<program>")
+
+        properties:
+            filename : the file being profiled
+
+            funcs : maps function keys to [primitive calls, calls, self time, cumulative time, callers], callers maps the keys of calling functions to [calls, primitive calls, self time, cumulative time]
+
+            lines : maps lines to [runs, time]
+
+            stack : [key, start time, time spent in called functions] for each function being run
+
+            active : number of times each function is on the stack, only calls that aren't recursive are primitive calls and add to cumulative time
+
+            total : time spent profiling before the last start
+
+            started : when profiling was last started, None if it is stopped
+
+            toplevel : time spent in functions called by the program
+
+        methods:
+            start () -> None
+            starts timing the program
+
+            stop () -> None
+            stops timing the program
+
+            enter (func : Function) -> None
+            starts timing a call
+
+            leave () -> None
+            stops timing the last call that was entered
+
+            line (line : int, elapsed : float) -> None
+            adds a run of a line
+
+            stats () -> dict
+            gets the function stats in the format of python's profiler
+
+            report () -> str
+            formats the stats of functions and lines
+
+            save (path : str) -> None
+            writes the function stats to a file pstats can load
+        """
+        # profiled file
+        self.filename = filename
+        # function and line stats
+        self.funcs = {}
+        self.lines = {}
+        # functions being run
+        self.stack = []
+        self.active = {}
+        # program time
+        self.total = 0.0
+        self.started = None
+        self.toplevel = 0.0
+    # starts timing the program
+    def start (self) -> None:
+        if (self.started is None):
+            self.started = perf_counter()
+    # stops timing the program
+    def stop (self) -> None:
+        if (self.started is not None):
+            self.total += perf_counter() - self.started
+            self.started = None
+    # gets the time spent profiling
+    def gettotal (self) -> float:
+        return self.total if self.started is None else self.total + perf_counter() - self.started
+    # starts timing a call
+    def enter (self, func : Function) -> None:
+        key = (self.filename, func.line, func.name or "<function>")
+        self.active[key] = self.active.get(key, 0) + 1
+        self.stack.append([key, perf_counter(), 0.0])
+    # stops timing the last call that was entered
+    def leave (self) -> None:
+        end = perf_counter()
+        key, start, inner = self.stack.pop()
+        elapsed = end - start
+        self.active[key] -= 1
+        # recursive calls are already timed by the call they were made from
+        primitive = self.active[key] == 0
+        stats = self.funcs.get(key)
+        if (stats is None):
+            stats = self.funcs[key] = [0, 0, 0.0, 0.0, {}]
+        if (self.stack):
+            caller = self.stack[-1][0]
+            # the time of the call isn't the caller's own time
+            self.stack[-1][2] += elapsed
+        else:
+            caller = (self.filename, 0, "<program>")
+            self.toplevel += elapsed
+        edge = stats[4].get(caller)
+        if (edge is None):
+            edge = stats[4][caller] = [0, 0, 0.0, 0.0]
+        stats[1] += 1
+        stats[2] += elapsed - inner
+        edge[0] += 1
+        edge[2] += elapsed - inner
+        if (primitive):
+            stats[0] += 1
+            stats[3] += elapsed
+            edge[1] += 1
+            edge[3] += elapsed
+    # adds a run of a line
+    def line (self, line : int, elapsed : float) -> None:
+        stats = self.lines.get(line)
+        if (stats is None):
+            self.lines[line] = [1, elapsed]
+        else:
+            stats[0] += 1
+            stats[1] += elapsed
+    # gets the function stats in the format of python's profiler
+    def stats (self) -> dict:
+        stats = {}
+        for key, (cc, nc, tt, ct, callers) in self.funcs.items():
+            stats[key] = (cc, nc, tt, ct, {caller:tuple(edge) for caller, edge in callers.items()})
+        # the program is the caller of functions called from the top level
+        total = self.gettotal()
+        stats[(self.filename, 0, "<program>")] = (1, 1, max(total - self.toplevel, 0.0), total, {})
+        return stats
+    # formats the stats of functions and lines
+    def report (self) -> str:
+        out = [f"total {self.gettotal() * 1000:.3f} ms", "functions:", f"\t{'calls':>10} {'cumulative':>12} {'self':>12}  function"]
+        # functions are sorted by cumulative time
+        for key, (cc, nc, tt, ct, callers) in sorted(self.funcs.items(), key=lambda item: -item[1][3]):
+            calls = str(nc) if cc == nc else f"{nc}/{cc}"
+            out.append(f"\t{calls:>10} {ct * 1000:>9.3f} ms {tt * 1000:>9.3f} ms  {key[2]} (line {key[1]})")
+        out += ["lines:", f"\t{'line':>6} {'runs':>10} {'time':>12}"]
+        # lines are in source order
+        for line, (runs, time) in sorted(self.lines.items()):
+            out.append(f"\t{line:>6} {runs:>10} {time * 1000:>9.3f} ms")
+        return "\n".join(out)
+    # writes the function stats to a file pstats can load
+    def save (self, path : str) -> None:
+        with open(path, "wb") as f:
+            marshal.dump(self.stats(), f)
+
+# optimizes parsed nodes before they are run
+class Optimizer ():
+    # initializes the optimizer
+    def __init__ (self, inter, functions : bool = True):
+        """
+        Optimizer (inter : Interpreter, functions : bool = True) -> Optimizer
+
+        folds expressions made only of constants, replaces variables of the constant scope with their values and removes statements that can't do anything
+
+        expression statements are removed if they only read variables and call pure functions, errors they would have caused, like reading an undefined variable, are removed with them
+
+        constant expressions are evaluated with the interpreter, expressions that cause an error aren't folded so the error happens when they are run
+
+        constant variables can't be function arguments because the names of arguments would hide them
+
+        constant functions are only replaced if functions is true, builtins belong to an interpreter so code shared by interpreters, like the code of modules, keeps their names
+
+        methods:
+            optimize (nodes : list) -> list
+            optimizes statement nodes, the bodies of functions they define are optimized too
+        """
+        # the interpreter used to evaluate constant expressions
+        self.inter = inter
+        # the constant scope
+        self.constants = inter.scopes[0].value
+        # if constant functions are replaced
+        self.functions = functions
+    # optimizes statements
+    def optimize (self, nodes : list) -> list:
+        out = []
+        for node in nodes:
+            line = node.line
+            node = self.statement(node)
+            # statements that can't do anything are removed
+            if (node is None):
+                continue
+            # optimized statements keep their line
+            node.line = line
+            out.append(node)
+            # statements after a return are never run
+            if (node.type == RET):
+                break
+        return out
+    # optimizes a statement, returns None if the statement can be removed
+    def statement (self, node : Node) -> Node:
+        t = node.type
+        # assignment
+        if (t == SET):
+            return Node(SET, node.value, (self.expression(node.args[0]),))
+        # return
+        if (t == RET):
+            return Node(RET, None, tuple(self.expression(arg) for arg in node.args))
+        # function definition
+        if (t == DEF):
+            self.function(node.value[1].value)
+            return node
+        # keyword statements and system flags
+        if (t == KEY or t == CFG):
+            return node
+        # expression statement, its value isn't used so it is removed if all it does is read variables and call pure functions
+        node = self.expression(node)
+        return None if pureexp(node) else node
+    # optimizes the arguments and body of a function
+    def function (self, func : Function) -> None:
+        # functions that have already been compiled keep the code they were compiled from
+        if (func.code is not None):
+            return
+        params = []
+        for name, default, varargs in func.getparams():
+            # arguments can't hide constants
+            if (name in self.constants):
+                raise Exception(1)
+            params.append((name, None if default is None else self.expression(default), varargs))
+        func.params = tuple(params)
+        func.nodes = self.optimize(func.getnodes())
+    # optimizes an expression
+    def expression (self, node : Node) -> Node:
+        t = node.type
+        if (t == CST):
+            return node
+        # constant variables are replaced with their values
+        if (t == VAR):
+            value = self.constants.get(node.value.value)
+            if (value is not None and (self.functions or value.type != FUN)):
+                return Node(CST, value)
+            return node
+        if (t == CAL):
+            return Node(CAL, self.expression(node.value), tuple(self.expression(arg) for arg in node.args))
+        # modules are imported and loaded when the code runs
+        if (t == IMP):
+            return node
+        if (t == ATR):
+            return Node(ATR, node.value, (self.expression(node.args[0]),))
+        # operations
+        args = tuple(self.expression(arg) for arg in node.args)
+        node = Node(t, node.value, args)
+        for arg in args:
+            if (arg.type != CST):
+                return node
+        return self.fold(node)
+    # evaluates an operation on constants
+    def fold (self, node : Node) -> Node:
+        try:
+            value = self.inter.evaluate(node)
+        except Exception:
+            # the error is left to happen when the code is run
+            return node
+        # concatenated strings are joined
+        if (value.__class__ is StrBuilder):
+            value = Token(STR, value.value)
+        return Node(CST, value)
+
+# a function implemented in python
+class Builtin ():
+    __slots__ = ("name", "func", "pure", "minargs", "code")
+    # initializes the builtin
+    def __init__ (self, name : str, func, pure : bool = False):
+        """
+        Builtin (name : str, func : callable, pure : bool = False) -> Builtin
+
+        the value of FUN tokens for native builtins, calling it calls func directly with unboxed arguments
+
+        properties:
+            name : the builtin's name
+
+            func : the python callable
+
+            pure : whether the result only depends on the arguments
+
+            minargs : number of arguments func needs, taken from its signature the first time the builtin is called, None until then
 
-            new_scope () -> None
-            adds a new variable scope
+            code : always None, builtins aren't compiled
 
-            remove_scope () -> None
-            removes the lowest level scope (can't remove global or constant scopes)
+        methods:
+            getpure () -> bool
+            checks if the builtin is pure
         """
-        # whether an audit is occuring
-        self.auditing = False
-        # if child scopes should audit variable changes
-        self.audit = False
-        # variable scopes
-        self.scopes = [Namespace(consts, self), Namespace({}, self)]
-        # variables that should be audited
-        self.auditvars = []
-    # sets audit policy for a scope
-    def audit_state (self, index : int, value : int) -> None:
-        # checks that index is valid
-        if (index >= 0 and index < len(self.scopes)):
-            # sets audit policy
-            self.scopes[index].auditstate = value
-    # adds a variable to audit
-    def add_audit (self, vname : str) -> None:
-        # checks that the variable name isn't already in self.auditvars
-        if (vname not in self.auditvars):
-            # adds the name to self.auditvars
-            self.auditvars.append(vname)
-    # removes a variable from auditing
-    def remove_audit (self, vname : str) -> None:
-        # checks that the name is in self.auditvars
-        if (vname in self.auditvars):
-            # removes the name from self.auditvars
-            self.auditvars.pop(self.auditvars.index(vname))
-    # adds a scope
-    def new_scope (self) -> None:
-        self.scopes.append(Namespace({}, self))
-    # removes a scope
-    def remove_scope (self) -> None:
-        if (len(self.scopes) > 2):
-            self.scopes.pop()
-    # returns string representation of the list
+        # builtin name
+        self.name = name
+        # python callable
+        self.func = func
+        # if the builtin is pure
+        self.pure = pure
+        # the number of required arguments is counted when the builtin is first called
+        self.minargs = None
+        # builtins don't have code
+        self.code = None
+    # checks if the builtin is pure
+    def getpure (self) -> bool:
+        return self.pure
+    # counts the arguments without defaults, callables without a signature can take any arguments
+    def _countargs (self) -> int:
+        # imports inspect when a builtin is first called since it is slow to import
+        import inspect
+        count = 0
+        try:
+            for param in inspect.signature(self.func).parameters.values():
+                if (param.default is param.empty and param.kind in (param.POSITIONAL_ONLY, param.POSITIONAL_OR_KEYWORD)):
+                    count += 1
+        except (TypeError, ValueError):
+            pass
+        return count
+    # calls the builtin with unboxed arguments
+    def __call__ (self, args : list):
+        minargs = self.minargs
+        if (minargs is None):
+            minargs = self.minargs = self._countargs()
+        # missing argument
+        if (len(args) < minargs):
+            raise Exception(9)
+        return self.func(*args)
+    # string representation of the builtin
     def __repr__ (self) -> str:
-        # gets the string representation of all scopes and formats them nicely
-        return "[\n"+",\n".join([str(self.scopes[i]) for i in range(len(self.scopes))])+"\n]"
-    # gets length of list
-    def __len__ (self) -> int:
-        return len(self.scopes)
-    # gets scope
-    def __getitem__ (self, ind : int) -> Namespace:
-        return self.scopes[ind]
-    # sets scope
-    def __setitem__ (self, ind : int, value : Namespace) -> None:
-        self.scopes[ind] = value
+        return f"<builtin {self.name}>"
 
-# system color palette
-class InterPalette ():
-    # inializes the palette
-    def __init__ (self):
+# loading states of modules
+UNLOADED, LOADING, LOADED = range(3)
+
+# a .spp file imported by an import statement
+class Module ():
+    __slots__ = ("name", "path", "namespace", "cache", "state", "nodes", "code", "token")
+    # initializes the module
+    def __init__ (self, name : str, path : str):
         """
-        InterPalette () -> InterPalette
+        Module (name : str, path : str) -> Module
 
-        the palette is used to store what colors the system should use when displaying certain types of outputs
+        the value of MDL tokens
+
+        modules are found when they are imported and loaded the first time one of their variables is used, loading compiles the file and runs it in the module's own global scope
+
+        modules are kept in the modules table by their path so every import of a file gives the same module and each file is compiled and run once per process
 
         properties:
-            [system colors] : the colors for different type of system output
+            name : the name the module was imported with
 
-            validcolornames : tuple of valid system colors
-        
-        methods:
-            has (attr : str) -> bool
-            returns true if the attr is in self.validcolornames
+            path : absolute path of the module's file
+
+            namespace : the module's global scope
+
+            cache : unboxed values of the module's globals used by the virtual machine
+
+            state : UNLOADED, LOADING while the module's code is running or LOADED
+
+            nodes : the compiled code, kept after the module is loaded, lines are only kept for the program so module statements don't have lines, builtins aren't put into the code since it is shared by every interpreter
+
+            code : the bytecode, kept after the module is loaded by the virtual machine
+
+            token : the module's MDL token
         """
-        # when program resets to default color
-        self.reset = "\x1b[39m"
-        # color for auditing header
-        self.audithead = "\x1b[38;2;200;100;0m"
-        # color for auditing output
-        self.audit = "\x1b[38;2;200;100;0m"
-        # color for error output
-        self.error = "\x1b[38;2;255;0;0m"
-        # color for warning output
-        self.warning = "\x1b[38;2;255;255;0m"
-        # color for normal output
-        self.output = "\x1b[38;2;0;100;200m"
-        # valid color names
-        self.validcolornames = ("reset", "audithead", "audit", "error", "warning", "output")
-    # checks if the given name is a valid color name
-    def has (self, attr : str) -> bool:
-        return (attr in self.validcolornames)
-    # sets a color
-    def __setitem__ (self, key, value):
-        if (key == "reset"):
-            self.reset = value
-        elif (key == "audithead"):
-            self.audithead = value
-        elif (key == "audit"):
-            self.audit = value
-        elif (key == "error"):
-            self.error = value
-        elif (key == "warning"):
-            self.warning = value
-        elif (key == "output"):
-            self.output = value
+        # module name
+        self.name = name
+        # file path
+        self.path = path
+        # global scope, its parent is set when it becomes the global scope
+        self.namespace = Namespace({}, None)
+        # unboxed globals
+        self.cache = {}
+        # loading state
+        self.state = UNLOADED
+        # compiled code
+        self.nodes = None
+        self.code = None
+        # module token
+        self.token = Token(MDL, self)
+    # string representation of the module
+    def __repr__ (self) -> str:
+        return f"<module {self.name}>"
 
-# regex for checking if a string is a valid ANSI color code
-ansire = re.compile("(\\\\x1b\[\d{2,2};\d{1,1};\d{1,3};\d{1,3};\d{1,3}m)|(\\\\x1b\[\d{2,2}m)")
+# loaded and imported modules keyed by their path, shared by every interpreter like sys.modules
+modules = {}
+
+# native builtins every interpreter has, maps names to their callable and whether they are pure, print is added by each interpreter since it writes to the interpreter's output
+nativebuiltins = {}
 
 # interprets code
 class Interpreter ():
     # initializes the interpreter
-    def __init__ (self, filename : str = "code", /, suppress : bool = False):
+    def __init__ (self, filename : str = "code", /, suppress : bool = False, stream : bool = False, engine : str = "ast", output = None):
         """
-        Interpreter (filename : str = "code", /, suppress : bool = False) -> Interpreter
+        Interpreter (filename : str = "code", /, suppress : bool = False, stream : bool = False, engine : str = "ast", output : file = None) -> Interpreter
 
         filename - defaults to "code", specifies the file to read from, if the file extension .spp isn't in the filename it will be added automatically
 
         suppress - defaults to False, keyword only argument, if set to true suppresses the automatic running of the interpreter
 
+        stream - defaults to False, keyword only argument, if set to true the file isn't read up front, it is tokenized and run statement by statement while it is being read, its output is written every 256 statements as well as when the buffer fills up
+
+        engine - defaults to "ast", keyword only argument, "ast" runs parsed code with a tree walker and "vm" compiles it to bytecode for the virtual machine, can also be set with "flag engine vm"
+
+        output - defaults to None, keyword only argument, file object everything the interpreter prints is written to, sys.stdout if it isn't given, output is buffered and colors are only written if it is a terminal
+
         the interpreter class will take the filename given, read it then will evaluate the code unless automatic running is suppressed
+
+        register_builtin (name : str, func : callable, /, pure : bool = False) -> Token
+        adds a constant function that calls func, pure builtins can be called by pure functions
+
+        add_hook (event : str, func : callable, /) -> None
+        calls func on every event of the given type, events are:
+            statement : func (line : int), before a statement runs, line is 0 if it isn't known
+            call : func (function : Function, args : list), before a function's body runs, memoized results don't call it
+            return : func (function : Function, value : Token), after a function's body returns
+            get : func (name : str, value : Token), when a variable is read
+            set : func (name : str, value : Token), when a variable is written
+            error : func (code : int), when the program stops because of an error
+        nothing is checked for an event until a hook is attached to it, get and set hooks turn memoization off like auditing does
+
+        remove_hook (event : str, func : callable, /) -> None
+        stops calling func on events of the given type
+
+        importmodule (name : str) -> Token
+        gets the token of the module name.spp in the directory of the file that is running, modules are loaded the first time one of their variables is used
+
+        recent - the last statements the tree walker ran and the last variable writes of both engines, printed with the error when a program stops because of one, entries are statement nodes, (name, value) tuples for writes and line numbers for the lines virtual machine code stopped on
+
+        set_output (stream : file = None, buffersize : int = 8192) -> None
+        flushes the current output and writes all later output to stream, output is written when buffersize characters have been collected, when a run ends and before python blocks run
         """
         # maximum error code
         self.mec = 0
-        # lines
-        self.lines = []
+        # the mapped source file and its decoded text, the text is decoded the first time it is used
+        self.source = b""
+        self._lines = ""
+        # if the code is streamed from the file
+        self.stream = stream
+        # execution engine
+        self.engine = engine
+        # valid execution engines
+        self.engines = ("ast", "vm")
         # language keywords
-        self.keywords = ("func", "if", "elif", "else", "for", "while", "in", "break", "continue", "python", "search", "switch", "return", "case", "default", "class", "global", "flag", "audit", "watch", "color", "dump", "existing")
+        self.keywords = ("func", "if", "elif", "else", "for", "while", "in", "break", "continue", "python", "search", "switch", "return", "case", "default", "class", "global", "flag", "audit", "watch", "color", "dump", "existing", "import")
+        # keyword lookup tables for the lexer, built the first time code is lexed
+        self._kwtable = None
+        self._kwtokens = None
         # system flags
-        self.flags = {"vars":False, "tokens":False, "error":False}
+        self.flags = {"vars":False, "tokens":False, "error":False, "cache":True, "optimize":True, "profile":False}
+        # profile of the program, made when profiling is first turned on
+        self.profile = None
+        # the profile while profiling is on, None while it is off
+        self.profiler = None
+        # if statements and calls are traced, they are while profiling or while hooks are attached to them
+        self.tracelines = False
+        self.tracecalls = False
+        # if code is compiled with its lines marked while statements aren't traced, it is when the program turns profiling on so lines can be timed from the flag on
+        self.marklines = False
+        # maximum number of results memoized for each pure function, set with "flag memo <size>", 0 turns memoization off
+        self.memosize = 128
+        # functions that have memoized results
+        self.memos = []
+        # recently run statements and variable writes, printed when the program stops with an error, the number kept is set with "flag record <size>"
+        self.recent = deque(maxlen=32)
+        # compiled python blocks keyed by their code
+        self.pycode = {}
         # non modifier token types
         self.nonmod = (REF, NUL, INT, STR, PAR, DCT, LST, BOL, FLO, OBJ, KWD)
         # modifier token types
         self.modtokens = (MAT, LOG, EQU)
         # tokens for debugging
         self.tokens = []
-        # sets up builtin functions
-        self.builtins = {"true":Token(BOL, True), "false":Token(BOL, False), "void":Token(NUL, None),"print":Token(FUN, (((Token(ELI, "..."), Token(REF, "args")), (Token(REF, "sep"), Token(ASS, "="), Token(STR, " ")), (Token(REF, "end"), Token(ASS, "="), Token(STR, "\n"))), (Token(KWD, "python"), Token("python", "    print(*args, sep=sep, end=end)"))))}
+        # the source line of each token in self.tokens
+        self.tokenlines = array("I")
+        # sets up builtin constants
+        self.builtins = {"true":TRUE, "false":FALSE, "void":VOID}
         # sets up variable scopes, top level scope is readonly constants and second scope is the program global scope, all other scopes are local scopes
-        self.scopes = NamespaceList(self.builtins)
-        # system color palette
-        self.colors = InterPalette()
+        # buffered output
+        self.output = Output(output)
+        self.scopes = NamespaceList(self.builtins, self.output)
+        # functions attached to events, get and set hooks are called by the scopes
+        self.hooks = {event:[] for event in hookevents}
+        self.hooks["get"] = self.scopes.gethooks
+        self.hooks["set"] = self.scopes.sethooks
+        # sets up builtin functions
+        for name, (func, pure) in nativebuiltins.items():
+            self.register_builtin(name, func, pure=pure)
+        self.register_builtin("print", self.output.print)
+        # system color palette, colors are only written to terminals
+        self.colors = InterPalette(self.output.tty)
         # gets code
         self._getData(filename)
         # checks that run isn't suppressed
         if (not suppress):
             # runs the interpreter
             self.run()
+    # keyword lookup table for the lexer, maps keywords to the method that lexes the rest of their statement
+    @property
+    def kwtable (self) -> dict:
+        if (self._kwtable is None):
+            self._buildkeywords()
+        return self._kwtable
+    # shared keyword tokens keyed by keyword
+    @property
+    def kwtokens (self) -> dict:
+        if (self._kwtokens is None):
+            self._buildkeywords()
+        return self._kwtokens
+    # builds the keyword lookup tables
+    def _buildkeywords (self) -> None:
+        self._kwtable = dict.fromkeys(self.keywords)
+        self._kwtable.update({"flag":self._lexflag, "color":self._lexcolor, "audit":self._lexaudit, "dump":self._lexdump, "existing":self._lexexisting, "watch":self._lexwatch, "python":self._lexpython})
+        self._kwtokens = {}
+        for keyword in self.keywords:
+            self._kwtokens[keyword] = fixedtokens.setdefault((KWD, keyword), FixedToken(KWD, keyword))
     # reads code from a file
     def _getData (self, filename : str) -> None:
-        # opens the file
-        f = open(filename+("" if filename.endswith(".spp") else ".spp"))
-        # reads file data
-        data = f.read()
-        # closes the file
-        f.close()
-        # sets self.lines to file contents
-        self.lines = data
-    # breaks lines of code
-    def breaklines (self, data : str) -> list:
-        # changes \\n to \n
-        data = data.replace("\\n", "\n")
-        # splits at newliines
-        data = data.split("\n")
-        # initial length
-        inlen = len(data)-1
-        # if the current part is in a string
-        isstr = False
-        for i in range(len(data)):
-            # goes from last to first
-            i = inlen-i
-            # checks that i is less than the length of the data
-            if (i >= len(data)):
+        # gets the file path
+        self.filename = filename+("" if filename.endswith(".spp") else ".spp")
+        # streamed code is read when it is run
+        if (self.stream):
+            return
+        # maps the file instead of reading it, the mapping's pages are read by the os when they are used and aren't part of the interpreter's memory
+        with open(self.filename, "rb") as f:
+            try:
+                self.source = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # empty files can't be mapped
+                self.source = b""
+        self._lines = None
+    # the source code, decoded from the mapped file when it is first used
+    @property
+    def lines (self) -> str:
+        if (self._lines is None):
+            self._lines = self._decode(self.source[:])
+        return self._lines
+    # decodes source bytes the way reading the file as text does
+    def _decode (self, data : bytes) -> str:
+        text = data.decode("utf-8")
+        # windows and old mac newlines become newlines
+        if ("\r" in text):
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        return text
+    # closes the mapped source file, tokens that haven't been decoded yet are decoded first so they can still be used
+    def _closesource (self) -> None:
+        if (self.source.__class__ is not mmap.mmap):
+            return
+        for token in self.tokens:
+            if (token.__class__ is SpanToken and token.source is not None):
+                token.value
+        self.source.close()
+        self.source = b""
+    # gets the path of the token cache for the source file
+    def _cachepath (self) -> str:
+        return self.filename + "c"
+    # gets the key the token cache is stored under
+    def _cachekey (self) -> bytes:
+        # imports hashlib when the cache is first used since it is slow to import
+        import hashlib
+        # the mapping is hashed without copying it
+        return hashlib.blake2b(self.source, digest_size=16).digest()
+    # tokenizes the source, loading the tokens from the token cache if it is up to date
+    def _gettokens (self) -> list:
+        # gets the cache key
+        key = self._cachekey()
+        # tries to load the tokens from the cache
+        tokens = self._loadcache(key)
+        if (tokens is not None):
+            return tokens
+        # gets the variables watched before tokenizing so the watches the code adds can be cached
+        watched = len(self.scopes.auditvars)
+        # tokenizes the mapped file a chunk at a time
+        tokens = self._tokenizemapped()
+        # applies cache flags from the code
+        for token in tokens:
+            if (token.type == CON and token.value[0] == "cache"):
+                self.flags["cache"] = {"on":True, "off":False, "switch":not self.flags["cache"]}[token.value[1]]
+        # stores the tokens if caching is on
+        if (self.flags["cache"]):
+            self._savecache(key, tokens, self.scopes.auditvars[watched:])
+        else:
+            # removes the stale cache
+            self._clearcache()
+        return tokens
+    # loads tokens from the token cache, returns None if there is no valid cache
+    def _loadcache (self, key : bytes):
+        try:
+            # reads the cache
+            with open(self._cachepath(), "rb") as f:
+                data = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        # checks that the cache was made by this version of the interpreter for this code
+        if (type(data) != tuple or len(data) != 6 or data[:3] != (cachemagic, cacheversion, key)):
+            return None
+        # re-applies watch statements
+        for vname in data[3]:
+            self.scopes.add_audit(vname)
+        # rebuilds the tokens, values stored as offsets are read from the mapped file
+        source = self.source
+        tokens = [SpanToken(source, t[1], t[2]) if len(t) == 3 else maketoken(t[0], t[1]) for t in data[4]]
+        # updates self.tokens and their lines
+        self.tokens = tokens
+        self.tokenlines = array("I", data[5])
+        return tokens
+    # writes tokens to the token cache
+    def _savecache (self, key : bytes, tokens : list, watched : list) -> None:
+        path = self._cachepath()
+        try:
+            # writes to a temporary file first so a partially written cache is never read
+            with open(path + ".tmp", "wb") as f:
+                marshal.dump((cachemagic, cacheversion, key, tuple(watched), [(t.type, t.start, t.end) if t.__class__ is SpanToken else (t.type, t.value) for t in tokens], self.tokenlines.tobytes()), f)
+            os.replace(path + ".tmp", path)
+        except (OSError, ValueError):
+            # the cache is optional so failures to write it are ignored
+            pass
+    # removes the token cache
+    def _clearcache (self) -> None:
+        try:
+            os.remove(self._cachepath())
+        except OSError:
+            pass
+    # gets the (start, end) spans of the lines of code from index start without copying the code, newlines and escaped newlines in strings don't end lines
+    def linespans (self, data : str, start : int = 0) -> list:
+        """
+        lines end at newlines and escaped newlines, a line with an odd number of quotes opens or closes a string and the lines from one that opens a string to the one that closes it are one line
+
+        if the quotes don't pair up, the first line that opens a string and every line before it are one line and the lines after it are paired again, the same as the original splitter that paired them from the end
+        """
+        spans = []
+        append = spans.append
+        find = data.find
+        count = data.count
+        size = len(data)
+        # the next newline and escaped newline, -1 if there are no more
+        nl = find("\n", start)
+        esc = find("\\n", start)
+        # start of the line that opened the current string, -1 outside of strings
+        opened = -1
+        # end of the first line that opened a string and the start of the line after it
+        first = None
+        pos = start
+        while True:
+            # the line ends at the nearest line break
+            if (esc != -1 and (nl == -1 or esc < nl)):
+                end = esc
+                after = esc + 2
+                esc = find("\\n", after)
+            elif (nl != -1):
+                end = nl
+                after = nl + 1
+                nl = find("\n", after)
+            else:
+                end = size
+                after = -1
+            # lines with an odd number of quotes open or close a string
+            if (count('"', pos, end) % 2 != 0):
+                if (opened == -1):
+                    opened = pos
+                    if (first is None):
+                        first = (end, after)
+                else:
+                    append((opened, end))
+                    opened = -1
+            elif (opened == -1):
+                append((pos, end))
+            if (after == -1):
                 break
-            # gets line
-            line = data[i]
-            # if a string is being opened or closed
-            if (line.count('"') % 2 != 0):
-                # if the current part is a string
-                if (isstr):
-                    # combines the parts of the line
-                    line = line + "\n" + data.pop(i+1)
-                    data[i] = line
-                # toggles isstr
-                isstr = not isstr
-            # if current part is a string
-            elif (isstr):
-                # combines the parts of the line
-                line += "\n" + data.pop(i+1)
-                data[i] = line
-        # returns the lines
-        return data
+            pos = after
+        # a string is still open so the quotes didn't pair up
+        if (opened != -1):
+            end, after = first
+            return [(start, end)] + ([] if after == -1 else self.linespans(data, after))
+        return spans
+    # breaks lines of code, gives the lines of linespans with escaped newlines made into newlines
+    def breaklines (self, data : str) -> list:
+        if ("\\n" in data):
+            return [data[s:e].replace("\\n", "\n") for s, e in self.linespans(data)]
+        return [data[s:e] for s, e in self.linespans(data)]
     # tokenizes a string of code
     def tokenize (self, line : str) -> list:
         # token list
         tokens = []
-        # index
-        i = 0
-        while i < len(line):
-            # updates self.tokens
-            self.tokens = tokens
-            # gets current character
-            char = line[i]
-            # checks for line seperation character
-            if (char == "\n" or char == ";"):
-                # increments i
-                i += 1
-                # continues tokenizing
+        # indexes of the tokens after newlines
+        newlines = []
+        # tokenizes all of the code
+        self._lex(line, 0, len(line), tokens, newlines=newlines)
+        # updates self.tokens and their lines
+        self.tokens = tokens
+        self.tokenlines = self._linetable(newlines, len(tokens))
+        # returns tokens
+        return tokens
+    # tokenizes the mapped source file a chunk at a time so its decoded text is never held all at once
+    def _tokenizemapped (self, chunksize : int = 1 << 20) -> list:
+        source = self.source
+        size = len(source)
+        # token list
+        tokens = []
+        # indexes of the tokens after newlines
+        newlines = []
+        # code that has been decoded but not tokenized
+        buf = ""
+        # if every character of buf is the byte at the same offset in the mapping, which lets tokens be offsets into it
+        exact = True
+        pos = 0
+        while pos < size:
+            # chunks end after a newline so characters and newlines are never split between chunks
+            end = size if pos + chunksize >= size else source.find(b"\n", pos + chunksize) + 1 or size
+            data = source[pos:end]
+            # characters only match bytes in ascii text without newlines that are normalized
+            exact = (exact or not buf) and data.isascii() and b"\r" not in data
+            buf += self._decode(data)
+            pos = end
+            # tokenizes the chunk and keeps whatever couldn't be tokenized until more is read
+            buf = buf[self._lex(buf, 0, len(buf), tokens, None, pos >= size, newlines, source if exact else None, pos - len(buf)):]
+        # updates self.tokens and their lines
+        self.tokens = tokens
+        self.tokenlines = self._linetable(newlines, len(tokens))
+        return tokens
+    # tokenizes code from index i until the limit is reached, returns the index lexing stopped at
+    def _lex (self, line : str, i : int, limit : int, tokens : list, breaks : list = None, final : bool = True, newlines : list = None, source : mmap.mmap = None, base : int = 0) -> int:
+        """
+        breaks - if given the index of the next token is appended to it whenever a newline or ; is skipped
+
+        newlines - if given the index of the next token is appended to it for every newline, including newlines in strings, comments and keyword statements
+
+        final - if false lexing stops before a string, comment or python block that isn't closed yet instead of treating it as unclosed, so that more code can be appended and lexing resumed from the returned index
+
+        source - if given long strings are SpanTokens into source and names are interned, line has to be the text of source starting at offset base
+        """
+        # local lookups for the hot loop
+        append = tokens.append
+        match = lexre.match
+        kwtable = self.kwtable
+        kwtokens = self.kwtokens
+        while i < limit:
+            # matches the next lexeme
+            m = match(line, i)
+            # gets which alternative matched
+            kind = m.lastgroup
+            # moves past the lexeme
+            i = m.end()
+            # spaces and tabs
+            if (kind == "skip"):
                 continue
-            # checks for comments
-            elif (i < len(line)-1 and line[i:i+2] == "//"):
-                # if the end of comment was found
-                found = False
-                isstr = False
-                # gets the end of the comment
-                while i < len(line):
-                    if (line[i] == '"' and line[i-1] != "\\"):
-                        isstr = not isstr
-                    if (line[i] == "\n" and not isstr):
-                        found = True
-                        break
-                    i += 1
-                # breaks tokenizer loop if the comment lasted until end of code
-                if (not found):
-                    break
-            # checks for mathmatical operation
-            elif (char in "+-*/%"):
-                # checks if the operation is an assignment
-                if (i < len(line)-1 and line[i+1] == "="):
-                    # adds assignment token
-                    tokens.append(Token(ASS, char+"="))
-                    # increases i
-                    i += 2
-                    # continues tokenizing
-                    continue
-                # adds mathmatical operator token
-                tokens.append(Token(MAT, char))
-            # checks for assignment
-            elif (char == "="):
-                # checks for equality
-                if (len(line) > i and line[i:i+2] == "=="):
-                    # adds equality token
-                    tokens.append(Token(EQU, "=="))
-                    # increases i
-                    i += 2
-                    # continues tokenizing
-                    continue
-                # adds assignment token
-                tokens.append(Token(ASS, char))
-            # checks for comparison
-            elif (char in "<>"):
-                v = char
-                if (len(line) > i and line[i+1] == "="):
-                    v += "="
-                    i += 1
-                tokens.append(Token(EQU, v))
-            # checks for logical operators
-            elif (char in "!&|^"):
-                # checks for equality
-                if (i < len(line)-1 and line[i+1] == "=" and char not in "&|^"):
-                    # adds equality token
-                    tokens.append(Token(EQU, char+"="))
-                    # increases i
-                    i += 2
-                    # continues tokenizing
-                    continue
-                # adds logical operator token
-                tokens.append(Token(LOG, char))
-            # checks for curly brackets
-            elif (char in "{}"):
-                # adds dictionary token
-                tokens.append(Token(DCT, char))
-            # checks for square brackets
-            elif (char in "[]"):
-                # adds list token
-                tokens.append(Token(LST, char))
-            # checks for parentheses
-            elif (char in "()"):
-                # adds parentheses token
-                tokens.append(Token(PAR, char))
-            # checks for dot syntax
-            elif (char == "."):
-                # adds dot token
-                tokens.append(Token(DOT, char))
-            # checks for comma
-            elif (char == ","):
-                # adds seperator token
-                tokens.append(Token(SEP, char))
-            # checks for colon
-            elif (char in ":"):
-                # adds symbol token
-                tokens.append(Token(SYM, char))
-            # checks for string opening
-            elif (char == '"'):
-                # if the end of the string was found
-                found = False
-                # char index
-                ci = i+1
-                # loops over code
-                while ci < len(line):
-                    # checks if char is string ending
-                    if (line[ci] == '"' and line[ci-1] != "\\"):
-                        # breaks out of loop
-                        found = True
-                        break
-                    # increments char index
-                    ci += 1
-                # if end of string wasn't found
-                if (not found):
-                    # unclosed string
-                    raise Exception(2)
-                # adds string token
-                tokens.append(Token(STR, '"'+line[i+1:ci]+'"'))
-                # increases i
-                i = ci
-            # checks for number
-            elif (char.isdigit()):
-                fin = ""
-                s = i
-                # if number is float
-                deciuse = False
-                # loops over code
-                while line[s].isdigit() and s < len(line):
-                    # gets test character
-                    c = line[s]
-                    # adds it to final
-                    fin += c
-                    # increments s
-                    s += 1
-                    # checks that s is a valid index for code
-                    if (s >= len(line)):
-                        break
-                    # checks for a decimal
-                    if (line[s] == "."):
-                        # if decimal already used
-                        if (deciuse):
-                            break
-                        # if next character is also a decimal
-                        if (line[s+1] == "."):
-                            break
-                        # if next character is start of a name
-                        if (line[s+1].isalpha()):
-                            break
-                        # sets float flag to true
-                        deciuse = True
-                        # adds decimal
-                        fin += "."
-                        # increments s
-                        s += 1
-                # increases i
-                i = s-1
+            # whitespace with newlines or line seperation characters in it and unknown characters
+            elif (kind == "brk" or kind == "other"):
+                text = m.group()
+                # records statement breaks
+                if (breaks is not None and ("\n" in text or ";" in text)):
+                    breaks.append(len(tokens))
+                # records newlines
+                if (newlines is not None and "\n" in text):
+                    newlines.extend(repeat(len(tokens), text.count("\n")))
+                continue
+            # identifiers and keywords
+            elif (kind == "name"):
+                # gets the identifier
+                word = m.group()
+                # checks for a keyword
+                if (word in kwtable):
+                    # gets the keyword's lexer if it has one
+                    handler = kwtable[word]
+                    # appends keyword token
+                    append(kwtokens[word])
+                    if (handler is not None):
+                        n = len(tokens)
+                        # lets the keyword consume the rest of its statement
+                        i = handler(line, m.start(), tokens)
+                        # the statement hasn't been read completely yet, removes its tokens so it is lexed again later
+                        if (i > len(line) and not final):
+                            del tokens[n-1:]
+                            return m.start()
+                        # records the newlines the keyword's statement spans
+                        if (newlines is not None):
+                            newlines.extend(repeat(len(tokens), line.count("\n", m.start(), i)))
+                else:
+                    # adds reference token, names read from a mapped file are interned so each name is only stored once
+                    append(Token(REF, word if source is None else sys.intern(word)))
+            # numbers
+            elif (kind == "number"):
+                # gets the number
+                fin = m.group()
                 # adds float token if decimal was used else adds integer token
-                tokens.append(Token(FLO if deciuse else INT, float(fin) if deciuse else int(fin)))
+                if ("." in fin):
+                    append(Token(FLO, float(fin)))
+                else:
+                    append(Token(INT, int(fin)))
+            # strings
+            elif (kind == "string"):
+                # adds string token without its quotes
+                if (source is None or i - m.start() - 2 < spanmin):
+                    append(Token(STR, line[m.start()+1:i-1]))
+                else:
+                    append(SpanToken(source, base + m.start() + 1, base + i - 1))
+                # records newlines in the string
+                if (newlines is not None):
+                    newlines.extend(repeat(len(tokens), line.count("\n", m.start(), i)))
+            # unclosed strings
+            elif (kind == "quote"):
+                # the rest of the string hasn't been read yet
+                if (not final):
+                    return m.start()
+                # unclosed string
+                raise Exception(2)
+            # comments
+            elif (kind == "comment"):
+                i = self._lexcomment(line, m.start())
+                # the end of the comment hasn't been read yet
+                if (i == len(line) and not final):
+                    return m.start()
+                # the newline ending the comment is a statement break
+                if (breaks is not None and line[i-1] == "\n"):
+                    breaks.append(len(tokens))
+                # records newlines in the comment
+                if (newlines is not None):
+                    newlines.extend(repeat(len(tokens), line.count("\n", m.start(), i)))
+            # operators, brackets, dots, commas and colons
             else:
-                found = False
-                # loops over all keywords
-                for keyword in self.keywords:
-                    # checks that the line isn't longer than the keyword
-                    if (len(line)-i >= len(keyword)):
-                        # gets where the keyword could be
-                        test = line[i:i+len(keyword)]
-                        # checks for a match with the keyword
-                        if (test == keyword):
-                            # tells the tokenizer that a keyword was found
-                            found = True
-                            # appends keyword token
-                            tokens.append(Token(KWD, test))
-                            # sets program flags
-                            if (keyword == "flag"):
-                                # gets keyword arguments
-                                sec = line[i:(i+line[i:].index("\n")) if "\n" in line[i:] else i+len(line[i:])].split(" ")
-                                # appends config token
-                                tokens.append(Token(CON, (sec[1], sec[2][:-1 if sec[2][-1] == "\n" else len(sec[2])])))
-                                # increases i
-                                i += len(" ".join(sec))
-                                break
-                            # sets system colors
-                            if (keyword == "color"):
-                                # gets rest of code
-                                rest = line[i + len(keyword) + 1:]
-                                # gets code to end of line
-                                v = line[i + len(keyword) + 1:(rest.index("\n")+i+len(keyword)+1) if "\n" in rest else len(line)]
-                                # increases i
-                                i += len(v) + len(keyword) + 1
-                                # splits v by spaces
-                                v = v.split(" ")
-                                # gets the first two items of v
-                                v = v[:min(2, len(v))]
-                                # checks that v has two items
-                                if (len(v) < 2):
-                                    break
-                                # checks that the property exists
-                                if (self.colors.has(v[0])):
-                                    # checks if the color given is ANSI
-                                    if (ansire.fullmatch(v[1])):
-                                        # adds color tokens
-                                        tokens.append(Token("color", v[0]))
-                                        tokens.append(Token("color", v[1].replace("\\x1b", "\x1b")))
-                                    else:
-                                        # tries to convert from common colors to ANSI
-                                        commoncolors = {"lime":"\x1b[38;2;0;255;0m","green":"\x1b[38;2;0;200;0m","orange":"\x1b[38;2;200;100;0m","yellow":"\x1b[38;2;255;255;0m","red":"\x1b[38;2;255;0;0m"}
-                                        if (v[1] not in commoncolors.keys()):
-                                            break
-                                        # adds color tokens
-                                        tokens.append(Token("color", v[0]))
-                                        tokens.append(Token("color", commoncolors[v[1]]))
-                                break
-                            # variable auditing
-                            if (keyword == "audit"):
-                                # checks if an argument was given
-                                if (len(line) > i + len(keyword) and line[i + len(keyword)] == " "):
-                                    # gets rest of the code
-                                    rest = line[i + len(keyword) + 1:]
-                                    v = line[i + len(keyword) + 1:(rest.index("\n")+i+len(keyword)+1) if "\n" in rest else len(line)]
-                                    # adds audit token
-                                    tokens.append(Token("audit", v))
-                                    # increases i
-                                    i += len(v) + 1
-                                i += len(keyword)
-                                break
-                            # dumps data
-                            if (keyword == "dump"):
-                                # checks that an argument is present
-                                if (len(line) > i + len(keyword) and line[i + len(keyword)] == " "):
-                                    # gets the rest of the code
-                                    rest = line[i + len(keyword) + 1:]
-                                    v = line[i + len(keyword) + 1:(rest.index("\n")+i+len(keyword)+1) if "\n" in rest else len(line)]
-                                    # checks that v is a valid object to dump
-                                    if (v in ("global", "local", "constant", "tokens", "space")):
-                                        # adds dump token
-                                        tokens.append(Token("dump", v))
-                                    else:
-                                        print(f"{self.colors.output}{v}{self.colors.reset}", len(v))
-                                    # increases i
-                                    i += len(v) + 1
-                                i += len(keyword)
-                                break
-                            # checks whether a variable exists
-                            if (keyword == "existing"):
-                                # checks that there is an argument
-                                if (len(line) > i + len(keyword) and line[i + len(keyword)] == " "):
-                                    # get the rest of the code
-                                    rest = line[i + len(keyword) + 1:]
-                                    v = line[i + len(keyword) + 1:(rest.index("\n")+i+len(keyword)+1) if "\n" in rest else len(line)]
-                                    # adds the existing token
-                                    tokens.append(Token("existing", v))
-                                    # increases i
-                                    i += len(v) + 1
-                                i += len(keyword)
-                                break
-                            # watches for variable changes
-                            if (keyword == "watch"):
-                                # gets the rest of the code
-                                rest = line[i + len(keyword) + 1:]
-                                # checks that there is code after the watch statement
-                                if ("\n" not in rest):
-                                    raise Exception(3)
-                                # gets variable name
-                                end = rest.index("\n")+i+len(keyword)+1
-                                v = line[i + len(keyword) + 1:end]
-                                # increses i
-                                i = end
-                                # adds audit
-                                self.scopes.add_audit(v)
-                                break
-                            # executes python code
-                            if (keyword == "python"):
-                                # checks that there is a code block after the python keyword
-                                if (line[i + len(keyword)] == "{" or line[i + len(keyword):i + len(keyword) + 2] == " {"):
-                                    # gets the python code
-                                    tstart = i+len(keyword)+(1 if line[i + len(keyword)] != "{" else 0)
-                                    test = line[tstart:]
-                                    t2 = test[2:]
-                                    i2 = 0
-                                    depth = 1
-                                    while i2 < len(t2):
-                                        if (t2[i2] == "{"):
-                                            depth += 1
-                                        if (t2[i2] == "}"):
-                                            depth -= 1
-                                        if (depth == 0):
-                                            break
-                                        i2 += 1
-                                    t2 = t2[:i2-1]
-                                    # adds the python token
-                                    tokens.append(Token("python", t2))
-                                    # increases i
-                                    i = tstart + i2 + 3
-                                break
-                            # increases i
-                            i += len(keyword)
-                            break
-                # continues tokenizing
-                if (found):
-                    continue
-                # gets to end of alphanumeric characters
-                ti = i
-                while ti < len(line):
-                    if (not line[ti].isalnum() and not line[ti] == "_"):
-                        break
-                    ti += 1
-                # if len wasn't zero
-                if (ti != i):
-                    # adds reference token
-                    tokens.append(Token(REF, line[i:ti]))
-                # increments ti if ti didn't change
-                if (ti == i):
-                    ti += 1
-                # increases i
-                i = ti
-                # continues tokenizing
+                append(optokens[m.group()])
+        return i
+    # gets the line of each token from the indexes of the tokens after newlines
+    def _linetable (self, newlines : list, count : int, line : int = 1) -> array:
+        lines = array("I")
+        start = 0
+        for end in newlines:
+            # tokens before the newline are on the current line
+            if (end > start):
+                lines.extend(array("I", (line,)) * (end - start))
+                start = end
+            line += 1
+        lines.extend(array("I", (line,)) * (count - start))
+        return lines
+    # tokenizes code read from a file object, yielding a list of tokens for each statement as soon as it has been read
+    def tokenstream (self, f, chunksize : int = 65536):
+        # code that has been read but not tokenized
+        buf = ""
+        # tokens of the statement being built and their lines
+        stmt = []
+        stmtlines = array("I")
+        # line of the next token
+        line = 1
+        # bracket depth of the statement being built
+        depth = 0
+        # if the whole file has been read
+        final = False
+        while not final:
+            # reads the next chunk
+            chunk = f.read(chunksize)
+            final = not chunk
+            buf += chunk
+            # only complete lines are tokenized until the end of the file
+            limit = len(buf) if final else buf.rfind("\n") + 1
+            if (limit == 0):
                 continue
-            # increments i
+            tokens = []
+            breaks = []
+            newlines = []
+            # tokenizes the complete lines and keeps whatever couldn't be tokenized yet
+            buf = buf[self._lex(buf, 0, limit, tokens, breaks, final, newlines):]
+            # gets the lines of the tokens
+            lines = self._linetable(newlines, len(tokens), line)
+            line += len(newlines)
+            if (final):
+                breaks.append(len(tokens))
+            # splits the tokens into statements
+            start = 0
+            for end in breaks:
+                for token in tokens[start:end]:
+                    # tracks bracket depth so function bodies and calls spanning lines stay in one statement
+                    if (token.type in (PAR, DCT, LST)):
+                        depth += 1 if token.value in "([{" else -1
+                    stmt.append(token)
+                stmtlines.extend(lines[start:end])
+                start = end
+                # statements end at newlines outside brackets unless the line ended with an operator
+                if (depth <= 0 and len(stmt) > 0 and stmt[-1].type not in (MAT, LOG, EQU, ASS, SEP, DOT)):
+                    self.tokens = stmt
+                    self.tokenlines = stmtlines
+                    yield stmt
+                    stmt = []
+                    stmtlines = array("I")
+                    depth = 0
+            for token in tokens[start:]:
+                if (token.type in (PAR, DCT, LST)):
+                    depth += 1 if token.value in "([{" else -1
+                stmt.append(token)
+            stmtlines.extend(lines[start:])
+        # yields the last statement
+        if (len(stmt) > 0):
+            self.tokens = stmt
+            self.tokenlines = stmtlines
+            yield stmt
+    # skips a comment, returns the index after it
+    def _lexcomment (self, line : str, i : int) -> int:
+        # gets the end of the line
+        end = line.find("\n", i)
+        # comment lasts until end of code
+        if (end == -1):
+            return len(line)
+        # fast path for comments without strings in them
+        if ('"' not in line[i:end]):
+            return end + 1
+        isstr = False
+        # gets the end of the comment, newlines inside strings don't end it
+        while i < len(line):
+            if (line[i] == '"' and line[i-1] != "\\"):
+                isstr = not isstr
+            if (line[i] == "\n" and not isstr):
+                return i + 1
             i += 1
-        # updates self.tokens
-        self.tokens = tokens
-        # returns tokens
-        return tokens
+        # comment lasted until end of code
+        return len(line)
+    # gets the index of the end of the line starting at i
+    def _lexeol (self, line : str, i : int) -> int:
+        end = line.find("\n", i)
+        return len(line) if end == -1 else end
+    # lexes a keyword with an optional argument that runs to the end of the line
+    def _lexarg (self, line : str, i : int, keyword : str):
+        # checks if an argument was given
+        if (len(line) > i + len(keyword) and line[i + len(keyword)] == " "):
+            # gets the argument and the index after it
+            end = self._lexeol(line, i + len(keyword) + 1)
+            return line[i + len(keyword) + 1:end], end
+        # no argument
+        return None, i + len(keyword)
+    # lexes program flags
+    def _lexflag (self, line : str, i : int, tokens : list) -> int:
+        # gets keyword arguments
+        end = self._lexeol(line, i)
+        sec = line[i:end].split(" ")
+        # appends config token
+        tokens.append(Token(CON, (sec[1], sec[2])))
+        return end
+    # lexes system colors
+    def _lexcolor (self, line : str, i : int, tokens : list) -> int:
+        # gets code to end of line
+        end = self._lexeol(line, i + 6)
+        # splits the line by spaces and gets the first two items
+        v = line[i + 6:end].split(" ")[:2]
+        # checks that v has two items and that the property exists
+        if (len(v) < 2 or not self.colors.has(v[0])):
+            return end
+        # checks if the color given is ANSI
+        if (ansire.fullmatch(v[1])):
+            # adds color tokens
+            tokens.append(Token(CLR, v[0]))
+            tokens.append(Token(CLR, v[1].replace("\\x1b", "\x1b")))
+        # tries to convert from common colors to ANSI
+        elif (v[1] in commoncolors):
+            # adds color tokens
+            tokens.append(Token(CLR, v[0]))
+            tokens.append(Token(CLR, commoncolors[v[1]]))
+        return end
+    # lexes variable auditing
+    def _lexaudit (self, line : str, i : int, tokens : list) -> int:
+        v, i = self._lexarg(line, i, "audit")
+        if (v is not None):
+            # adds audit token
+            tokens.append(Token(AUD, v))
+        return i
+    # lexes data dumps
+    def _lexdump (self, line : str, i : int, tokens : list) -> int:
+        v, i = self._lexarg(line, i, "dump")
+        if (v is not None):
+            # adds dump token, invalid objects are reported when the dump runs so tokens loaded from the cache report them too
+            tokens.append(Token(DMP, v))
+        return i
+    # lexes variable existence checks
+    def _lexexisting (self, line : str, i : int, tokens : list) -> int:
+        v, i = self._lexarg(line, i, "existing")
+        if (v is not None):
+            # adds the existing token
+            tokens.append(Token(EXS, v))
+        return i
+    # lexes variable watches
+    def _lexwatch (self, line : str, i : int, tokens : list) -> int:
+        # checks that there is code after the watch statement
+        end = line.find("\n", i + 6)
+        if (end == -1):
+            raise Exception(3)
+        # adds audit
+        self.scopes.add_audit(line[i + 6:end])
+        return end
+    # lexes python blocks
+    def _lexpython (self, line : str, i : int, tokens : list) -> int:
+        # checks that there is a code block after the python keyword
+        if (line[i + 6:i + 7] != "{" and line[i + 6:i + 8] != " {"):
+            return i + 6
+        # gets the start of the block
+        tstart = i + 6 + (1 if line[i + 6] != "{" else 0)
+        # finds the matching closing bracket
+        depth = 1
+        close = len(line)
+        for m in bracere.finditer(line, tstart + 2):
+            depth += 1 if m.group() == "{" else -1
+            if (depth == 0):
+                close = m.start()
+                break
+        # adds the python token
+        tokens.append(Token(PYC, line[tstart + 2:close - 1]))
+        return close + 1
     # runs python function
     def pythonFunc (self, tokens : list) -> Token:
-        return Token(NUL, None)
+        return VOID
     # runs python blocks
     def doPython (self, data : dict) -> Token:
         # gets code
         code = data["code"]
-        code = self.breaklines(code)
+        # gets the compiled block, blocks are compiled the first time they are run
+        func = self.pycode.get(code)
+        if (func is None):
+            func = self._compilepython(code)
+        # output printed before the block is written first so it comes before anything the block prints
+        self.output.flush()
+        # runs the block as a function with the given globals or the interpreter's globals
+        result = FunctionType(func, data["globals"] if "globals" in data else globals())()
+        # converts the result to a token
+        return self._pytoken(result)
+    # compiles a python block into the code of a function that runs it
+    def _compilepython (self, code : str):
+        lines = self.breaklines(code)
         # removes all leading indentation
-        for i in range(len(code)):
-            code[i] = code[i].removeprefix("\t")
+        for i in range(len(lines)):
+            lines[i] = lines[i].removeprefix("\t")
         # adds indentation
-        code[0] = "\t"+code[0]
-        code = "\n\t".join(code)
+        lines[0] = "\t"+lines[0]
         # wraps code in a function
-        code = "def private ():\n"+code+"\nglobal f\nf = private"
-        # checks if data was given globals
-        if ("globals" in data):
-            # executes code with globals and locals if provided
-            exec(code, data["globals"], data["locals"] if "locals" in data else data["globals"])
-        else:
-            # executes code without globals
-            exec(code)
-        # runs the code
-        result = f()
-        # if result is string adds quotes to it
-        if (type(result) == str):
-            result = '"' + result + '"'
-        # returns result
-        return Token(NUL, None)
+        source = "def private ():\n"+"\n\t".join(lines)
+        # gets the function's code out of the compiled module
+        namespace = {}
+        exec(compile(source, "<python>", "exec"), namespace)
+        func = namespace["private"].__code__
+        self.pycode[code] = func
+        return func
     # unpacks a reference token
     def deref (self, token : Token, /, check : bool = False):
-        # flag for if deref is being used to check whether a variable exists
-        if (check):
-            # looks through all scopes
-            for i in range(len(self.scopes)):
-                scope = self.scopes[i]
-                if (token in scope.keys()):
+        # checks are given the name instead of a reference token
+        name = token if check else token.value
+        scopes = self.scopes.scopes
+        # names are resolved the same way the virtual machine resolves them, in the running function's scope, then the global scope, then the constant scope
+        for scope in ((scopes[-1], scopes[1], scopes[0]) if len(scopes) > 2 else (scopes[1], scopes[0])):
+            variables = scope.value
+            if (name in variables):
+                # checks if the variable exists
+                if (check):
                     return True
+                # audited and hooked scopes are read through so the get is seen
+                return scope[name] if self.scopes.traced else variables[name]
+        # checks if the variable exists
+        if (check):
             return False
-        # looks through all scopes
-        for i in range(len(self.scopes)):
-            # gets scopes from last to first
-            scope = self.scopes[-1-i]
-            # checks if the variable is in the scope
-            if (token.value in scope.keys()):
-                # returns the variable's value
-                return scope[token.value]
-        print(token, "INV DEREF")
         # undefined variable name
         raise Exception(3)
+    # converts a python value to a token
+    def _pytoken (self, value) -> Token:
+        return maketoken(self._getttype(value), value)
+    # adds a native builtin function
+    def register_builtin (self, name : str, func, /, pure : bool = False) -> Token:
+        token = Token(FUN, Builtin(name, func, pure))
+        # builtins are constants, setting them in the constant scope removes cached values
+        self.scopes[0][name] = token
+        return token
+    # changes where output is written
+    def set_output (self, stream = None, buffersize : int = 8192) -> None:
+        self.output.flush()
+        self.output.stream = stream
+        self.output.buffersize = buffersize
+        # checks if the new stream is a terminal
+        try:
+            self.output.tty = (sys.stdout if stream is None else stream).isatty()
+        except (AttributeError, ValueError):
+            self.output.tty = False
+        self.colors.enabled = self.output.tty
+    # attaches a function to an event
+    def add_hook (self, event : str, func, /) -> None:
+        if (event not in self.hooks):
+            raise ValueError(f"unknown event {event!r}, events are {', '.join(hookevents)}")
+        self.hooks[event].append(func)
+        self._updatetracing()
+    # detaches a function from an event
+    def remove_hook (self, event : str, func, /) -> None:
+        if (event in self.hooks and func in self.hooks[event]):
+            self.hooks[event].remove(func)
+        self._updatetracing()
+    # turns the tracing of statements, calls and variables on while the profiler or hooks need it
+    def _updatetracing (self) -> None:
+        self.tracelines = self.profiler is not None or len(self.hooks["statement"]) > 0
+        self.tracecalls = self.profiler is not None or len(self.hooks["call"]) > 0 or len(self.hooks["return"]) > 0
+        self.scopes.swap_classes()
     # gets resulting token type
-    def _getttype (self, value) -> str:
+    def _getttype (self, value) -> int:
         r = ERR
         t = type(value)
         if (t == str):
@@ -735,12 +2910,14 @@ class Interpreter ():
             r = FLO
         elif (t == bool):
             r = BOL
-        elif (t == None):
+        elif (value is None):
             r = NUL
         elif (t == list):
             r = LST
         elif (t == dict):
             r = DCT
+        elif (t == NumArray):
+            r = ARR
         return r
     # does a mathmatical operation
     def domod (self, base : Token, op : Token, mod : Token) -> Token:
@@ -749,22 +2926,15 @@ class Interpreter ():
             mod = self.deref(mod)
         if (base.type == REF):
             base = self.deref(base)
-        # stores if the base or mod tokens are strings
-        isstr = False
-        modstr = False
-        # unpacks string values if necessary
-        if (base.type == STR):
-            isstr = True
-            base.value = base.value[1:-1]
-        if (mod.type == STR):
-            modstr = True
-            mod.value = mod.value[1:-1]
         # gets the operation
         op = op.value
         # operation result
         result = None
         # addition / concatination
         if (op == "+"):
+            # strings are concatenated with a StrBuilder so adding to a string doesn't copy it
+            if (base.type == STR and mod.type == STR):
+                return concat(base if base.__class__ is StrBuilder else base.value, mod.value)
             result = base.value + mod.value
         # subtraction
         elif (op == "-"):
@@ -774,206 +2944,748 @@ class Interpreter ():
             result = base.value * mod.value
         # division
         elif (op == "/"):
-            # checks for divide by zero
-            if (mod.value == 0):
+            # checks for divide by zero, arrays check their own elements
+            if (mod.type != ARR and mod.value == 0):
                 raise Exception(6)
             result = base.value / mod.value
         # modulo (remainder)
         elif (op == "%"):
             result = base.value % mod.value
-        # repacks strings if necessary
-        if (isstr):
-            result = '"' + result + '"'
-            base.value = '"' + base.value + '"'
-        if (modstr):
-            mod.value = '"' + mod.value + '"'
         # returns result
         return Token(self._getttype(result), result)
-    # collapses expressions
-    def _collapseexp (self, tokens : list, start : int) -> list:
-        print(tokens, start, tokens[start])
-        tind = start
-        while tind < len(tokens):
-            token = tokens[tind]
-            print(token)
-            if (token.type == REF and self.deref(token).type == FUN):
-                token = self.deref(token)
-                tokens[tind] = token
-                tokens, placeholder = self.runfunc(tokens, tind)
-                if (tokens[tind+1].type == REF):
-                    break
-            elif (token.type == LOG):
-                if (token.value == "!"):
-                    pass
-            elif (token.type == EQU):
-                if (tokens[tind-1].type == REF):
-                    tokens[tind-1] = self.deref(tokens[tind-1])
-                if (tokens[tind+1].type == REF):
-                    tokens[tind+1] = self.deref(tokens[tind+1])
-                if (token.value == "=="):
-                    res = tokens[tind-1] == tokens[tind+1]
-                elif (token.value == ">="):
-                    res = tokens[tind-1].value >= tokens[tind+1].value
-                elif (token.value == "<="):
-                    res = tokens[tind-1].value <= tokens[tind+1].value
-                elif (token.value == "!="):
-                    res = tokens[tind-1] != tokens[tind+1]
-                elif (token.value == ">"):
-                    res = tokens[tind-1].value > tokens[tind+1].value
-                elif (token.value == "<"):
-                    res = tokens[tind-1].value < tokens[tind+1].value
-                tokens[tind-1] = Token(BOL, res)
-                print(tokens)
-            tind += 1
-        return tokens
-    # gets the result of a mathmatical expression
-    def getexp (self, tokens : list, start : int):
-        tokens = self._collapseexp(tokens, start+2)
-        # starting index
-        i = start+2
-        # result
-        result = tokens[start+1]
-        # unpacks reference if necessary
-        if (result.type == REF):
-            result = self.deref(result)
-        # loops through tokens
-        while i < len(tokens):
-            # gets token
-            token = tokens[i]
-            ret = None
-            # if token type isn't a modifier exit loop
-            if (token.type not in self.modtokens):
-                break
-            # get value
-            if (token.type == MAT):
-                ret = self.domod(result, token, tokens[i+1])
-            # something went wrong, break out of loop
-            if (ret == None):
-                break
-            # set result
-            result = ret
-            # increase i
-            i += 2
-        # decrement i
-        i -= 1
-        # returns result and new index
-        return result, i
-    # gets the tokens that are part of a function
-    def getfunc (self, tokens : list, start : int):
-        # index
-        i = start+3
-        # bracket depth
-        depth = 1
-        # args
-        args = []
-        # building args
-        build = []
-        # body
-        ftoks = []
-        # loops through tokens to find args
-        while i < len(tokens):
-            token = tokens[i]
-            # if depth changes
-            if (token.type == PAR):
-                # changes parenthesis depth
-                if (token.value == "("):
-                    depth += 1
-                else:
-                    depth -= 1
-                # final closing parenthesis
-                if (depth == 0):
-                    args.append(tuple(build))
-                    break
-            # new argument
-            elif (token.type == SEP):
-                # append argument
-                args.append(tuple(build))
-                # result build
-                build = []
+    # does a comparison
+    def docomp (self, base : Token, op : str, mod : Token) -> Token:
+        # arrays are compared element-wise
+        if (base.type == ARR or mod.type == ARR):
+            try:
+                return Token(ARR, cmpfuncs[op](base.value, mod.value))
+            except TypeError:
+                # invalid types for comparison
+                raise Exception(5)
+        # equality compares types and values
+        if (op == "=="):
+            return booltokens[base == mod]
+        if (op == "!="):
+            return booltokens[base != mod]
+        # ordering compares values
+        try:
+            if (op == ">="):
+                res = base.value >= mod.value
+            elif (op == "<="):
+                res = base.value <= mod.value
+            elif (op == ">"):
+                res = base.value > mod.value
             else:
-                # add token to build
-                build.append(token)
-            # increment i
-            i += 1
-        # reset depth
-        depth = 1
-        # increase i
-        i += 2
-        # loop through tokens to find function body
-        while i < len(tokens):
-            # gets token
-            token = tokens[i]
-            # if depth changes
-            if (token.type == DCT):
-                # change depth
-                if (token.value == "{"):
-                    depth += 1
-                else:
-                    depth -= 1
-                # final closing bracket
-                if (depth == 0):
-                    break
+                res = base.value < mod.value
+        except TypeError:
+            # invalid types for comparison
+            raise Exception(5)
+        return booltokens[res]
+    # does a logical operation
+    def dologic (self, base : Token, op : str, mod : Token) -> Token:
+        try:
+            if (op == "&"):
+                result = base.value & mod.value
+            elif (op == "|"):
+                result = base.value | mod.value
             else:
-                # add token to function body tokens
-                ftoks.append(token)
-            # increment i
-            i += 1
-        # generate result
-        result = Token(FUN, (tuple(args), tuple(ftoks)))
-        # return result and new index
-        return result, i
+                result = base.value ^ mod.value
+        except TypeError:
+            # invalid types for operation
+            raise Exception(5)
+        return Token(self._getttype(result), result)
+    # parses tokens into nodes
+    def parse (self, tokens : list) -> list:
+        # the lines of the tokens are only known for the tokens that were lexed last
+        return Parser(tokens, self.tokenlines if tokens is self.tokens else None).parse()
+    # calls a function with already evaluated arguments
+    def call (self, func : Token, args : list) -> Token:
+        # native builtins are called directly with unboxed arguments
+        if (func.value.__class__ is Builtin):
+            try:
+                return self._pytoken(func.value([unbox(arg) for arg in args]))
+            except TypeError:
+                # invalid types for the builtin
+                raise Exception(5)
+        # functions already known to be impure skip the memo
+        memo = self._getmemo(func.value) if self.memosize != 0 and func.value.pure is not False else None
+        if (memo is None):
+            return self._call(func, args)
+        # pure functions return the result of an earlier call with the same arguments
+        key = tuple([(arg.type, arg.value) for arg in args])
+        ret = memo.get(key)
+        if (ret is UNSET):
+            ret = self._call(func, args)
+            memo.put(key, ret, self.memosize)
+        return ret
+    # gets the memo of a function, None if its calls aren't memoized
+    def _getmemo (self, func : Function) -> Memo:
+        # calls are run while auditing or while get and set hooks are attached so their gets and sets are seen, and while profiling so every call is counted
+        if (self.memosize == 0 or self.scopes.traced or self.profiler is not None or not func.getpure()):
+            return None
+        if (func.memo is None):
+            func.memo = Memo()
+            self.memos.append(func)
+        return func.memo
+    # calls a function without memoizing it
+    def _call (self, func : Token, args : list) -> Token:
+        if (self.tracecalls):
+            return self._tracecall(func, args, self._runcall, False)
+        return self._runcall(func, args)
+    # runs a call with the call and return hooks and the profiler
+    def _tracecall (self, func : Token, args : list, run, vm : bool):
+        hooks = self.hooks
+        profiler = self.profiler
+        # hooks are given tokens by both engines
+        for hook in hooks["call"]:
+            hook(func.value, [box(arg) for arg in args] if vm else list(args))
+        if (profiler is not None):
+            profiler.enter(func.value)
+        try:
+            ret = run(func, args)
+        finally:
+            if (profiler is not None):
+                profiler.leave()
+        for hook in hooks["return"]:
+            hook(func.value, box(ret) if vm else ret)
+        return ret
+    # runs a function's body in a new scope
+    def _runcall (self, func : Token, args : list) -> Token:
+        # functions run with the globals of the module they were defined in
+        if (func.value.module is not self.scopes.module):
+            return self._inmodule(func.value.module, self._runcall, func, args)
+        # adds the function's scope
+        self.scopes.new_scope()
+        try:
+            # writes arguments to the function's scope
+            self._writevars(func, args)
+            # runs the function body
+            ret = self.execute(func.value.getnodes())
+        finally:
+            # removes the function's scope
+            self.scopes.remove_scope()
+        # functions without a return statement return void
+        return VOID if ret is None else ret
+    # writes function arguments to the function's scope
     def _writevars (self, func : Token, args : list) -> None:
-        fargs = func.value[0]
-        for i in range(len(fargs)):
+        scope = self.scopes[-1]
+        i = 0
+        for name, default, varargs in func.value.getparams():
+            # variable arguments take the rest of the arguments as a list
+            if (varargs):
+                scope[name] = Token(LST, list(args[i:]))
+                return
             if (len(args) <= i):
-                if (Token(ASS, "=") in fargs[i]):
-                    arg = fargs[i][fargs[i].index(Token(ASS, "="))+1:]
-                else:
-                    # missing argument
+                # missing argument
+                if (default is None):
                     raise Exception(9)
+                # uses the default value
+                scope[name] = self.evaluate(default)
             else:
-                arg = args[i]
-            if (len(arg) == 0):
-                # empty argument
-                raise Exception(8)
-            self.scopes[-1][fargs[i][0].value] = self.evaltokens(list(arg))[0]
-    def runfunc (self, tokens : list, tind : int):
-        ftok = tokens[tind]
-        tind += 2
-        depth = 1
-        args = []
-        build = []
-        while tind < len(tokens):
-            token = tokens[tind]
-            build.append(token)
-            if (token.type == PAR):
-                if (token.value == "("):
-                    depth += 1
+                scope[name] = args[i]
+            i += 1
+    # executes statement nodes, returns the returned token if a return statement was run
+    def execute (self, nodes : list):
+        # statements are run one at a time while they are traced so hooks can be called for them and their lines can be timed
+        if (self.tracelines):
+            return self._executetraced(nodes)
+        return self._execute(nodes)
+    # executes statement nodes, calling statement hooks and timing each statement's line while profiling
+    def _executetraced (self, nodes : list):
+        hooks = self.hooks["statement"]
+        for node in nodes:
+            # profiling can be started or stopped by the statements
+            profiler = self.profiler
+            for hook in hooks:
+                hook(node.line)
+            start = perf_counter()
+            try:
+                ret = self._execute((node,))
+            finally:
+                if (profiler is not None and node.line):
+                    profiler.line(node.line, perf_counter() - start)
+            if (ret is not None):
+                return ret
+        return None
+    # executes statement nodes without tracing them
+    def _execute (self, nodes : list):
+        # records statements before they run so the statement an error happens in is recorded
+        record = self.recent.append
+        for node in nodes:
+            record(node)
+            t = node.type
+            # assignment
+            if (t == SET):
+                # checks that assignment is not being done to a constant variable
+                if (node.value in self.scopes[0].keys()):
+                    # assignment to constant
+                    raise Exception(1)
+                # sets variable
+                value = self.evaluate(node.args[0])
+                self.scopes[-1][node.value] = value
+                record((node.value, value))
+            # return
+            elif (t == RET):
+                return self.evaluate(node.args[0]) if len(node.args) > 0 else VOID
+            # function definition
+            elif (t == DEF):
+                name, func = node.value
+                # checks name isn't same as a constant variable
+                if (name in self.scopes[0].keys()):
+                    # assignment to constant
+                    raise Exception(1)
+                # puts function into lowest namespace
+                self.scopes[-1][name] = func
+            # keyword statements
+            elif (t == KEY):
+                ret = self._dokeyword(node.value, node.args)
+                # python blocks in function bodies can return values, the function's scope is above the constant and global scopes
+                if (ret is not None and len(self.scopes.scopes) > 2):
+                    return ret
+            # config token
+            elif (t == CFG):
+                self._setflag(node.value)
+                # the record flag can replace the record
+                record = self.recent.append
+                # the statements after a flag that turns tracing on, like the profile flag, are traced
+                if (self.tracelines):
+                    return self._executetraced(nodes[nodes.index(node)+1:])
+            # expression statement
+            else:
+                self.evaluate(node)
+        return None
+    # optimizes nodes
+    def optimize (self, nodes : list, functions : bool = True) -> list:
+        return Optimizer(self, functions).optimize(nodes)
+    # compiles nodes into bytecode
+    def compile (self, nodes : list, function : bool = False) -> Code:
+        # statements are marked with their lines while they are traced or when the program will turn profiling on
+        return Compiler(lines=self.tracelines or self.marklines).compile(nodes, function)
+    # calls a function from the virtual machine with unboxed arguments, returns the unboxed result
+    def callvm (self, func : Token, args : list):
+        # native builtins are called directly
+        if (func.value.__class__ is Builtin):
+            return unbox(self._pytoken(func.value(args)))
+        # functions already known to be impure skip the memo
+        memo = self._getmemo(func.value) if self.memosize != 0 and func.value.pure is not False else None
+        if (memo is None):
+            # the same as _callvm, without the extra call
+            if (self.tracecalls):
+                return self._tracecall(func, args, self._runcallvm, True)
+            return self._runcallvm(func, args)
+        # pure functions return the result of an earlier call with the same arguments, values are keyed with their types so true and 1 are different
+        key = tuple([(type(arg), arg) for arg in args])
+        ret = memo.get(key)
+        if (ret is UNSET):
+            ret = self._callvm(func, args)
+            memo.put(key, ret, self.memosize)
+        return ret
+    # calls a function from the virtual machine without memoizing it
+    def _callvm (self, func : Token, args : list):
+        if (self.tracecalls):
+            return self._tracecall(func, args, self._runcallvm, True)
+        return self._runcallvm(func, args)
+    # runs a function's code in a new frame
+    def _runcallvm (self, func : Token, args : list):
+        function = func.value
+        scopes = self.scopes
+        # functions run with the globals of the module they were defined in
+        if (function.module is not scopes.module):
+            return self._inmodule(function.module, self._runcallvm, func, args)
+        # gets the function's code, it is compiled on the first call if the function wasn't defined by the virtual machine
+        code = function.code
+        if (code is None):
+            code = function.getcode(self.tracelines or self.marklines)
+        # arguments are used as the frame's first slots while nothing is traced if the rest of the slots can be filled without evaluating anything
+        fill = code.argfills.get(len(args))
+        if (fill is not None and not scopes.traced):
+            scopes.scopes.append(Frame(code.varnames, scopes, code.varindex, args + fill))
+            try:
+                return self.runcode(code, scopes.scopes[-1])
+            finally:
+                # removes the function's frame
+                scopes.scopes.pop()
+        # adds the function's frame
+        frame = Frame(code.varnames, scopes, code.varindex)
+        scopes.push_frame(frame)
+        try:
+            # writes arguments to the function's frame
+            slots = frame.slots
+            # arguments are written through audited and hooked frames so they are seen as sets
+            traced = scopes.traced
+            i = 0
+            for slot, default, varargs in code.params:
+                # variable arguments take the rest of the arguments as a list
+                if (varargs):
+                    value = Token(LST, [box(arg) for arg in args[i:]])
+                elif (i < len(args)):
+                    value = args[i]
+                # missing argument
+                elif (default is UNSET):
+                    raise Exception(9)
+                # evaluates the default value
+                elif (default.__class__ is Node):
+                    value = unbox(self.evaluate(default))
+                # constant default value
                 else:
-                    depth -= 1
-                if (depth == 0):
-                    tokens.pop(tind)
-                    build.pop()
-                    if (len(build) > 0):
-                        args.append(build)
+                    value = default
+                if (traced):
+                    frame[code.varnames[slot]] = box(value)
+                else:
+                    slots[slot] = value
+                # variable arguments are the last argument
+                if (varargs):
                     break
-            elif (token.type == SEP):
-                build.pop()
-                args.append(build)
-                build = []
-            tokens.pop(tind)
-        tokens.pop(tind-1)
-        self.scopes.new_scope()
-        self._writevars(ftok, args)
-        ret = self.evaltokens(list(ftok.value[1]))[0]
-        if (ret.type == REF):
-            ret = self.deref(ret)
-        tokens[tind-2] = ret
-        self.scopes.remove_scope()
-        return tokens, tind
+                i += 1
+            # runs the function's code
+            return self.runcode(code, frame)
+        finally:
+            # removes the function's frame
+            scopes.remove_scope()
+    # runs run(*args) with the globals of a module as the global scope
+    def _inmodule (self, module : Module, run, *args):
+        previous = self.scopes.set_module(module)
+        try:
+            return run(*args)
+        finally:
+            self.scopes.set_module(previous)
+    # imports a module
+    def importmodule (self, name : str) -> Token:
+        # modules are found next to the file that imports them
+        importer = self.scopes.module
+        path = os.path.join(os.path.dirname(os.path.abspath(self.filename if importer is None else importer.path)), name + ".spp")
+        module = modules.get(path)
+        if (module is None):
+            # missing module
+            if (not os.path.isfile(path)):
+                raise Exception(11)
+            module = modules[path] = Module(name, path)
+        return module.token
+    # gets a variable of a module, loading the module if it hasn't been loaded
+    def getattribute (self, value, name : str) -> Token:
+        # checks that the value is a module
+        if (value.__class__ is not Token or value.type != MDL):
+            raise Exception(5)
+        module = value.value
+        if (module.state == UNLOADED):
+            self._loadmodule(module)
+        variables = module.namespace.value
+        if (name not in variables):
+            # the module is still running and hasn't set the variable, it was used by a module the module imports
+            if (module.state == LOADING):
+                raise Exception(12)
+            # undefined variable name
+            raise Exception(3)
+        return variables[name]
+    # compiles a module and runs it in its global scope
+    def _loadmodule (self, module : Module) -> None:
+        module.state = LOADING
+        scopes = self.scopes
+        # the module runs at the top level even when it is loaded by a function
+        frames = scopes.scopes[2:]
+        del scopes.scopes[2:]
+        previous = scopes.set_module(module)
+        try:
+            # modules are compiled once
+            if (module.nodes is None):
+                module.nodes = self._compilemodule(module)
+            if (self.engine == "vm"):
+                if (module.code is None):
+                    module.code = self.compile(module.nodes)
+                self.runcode(module.code)
+            else:
+                self.execute(module.nodes)
+            module.state = LOADED
+        except BaseException:
+            # modules that stop with an error are loaded again the next time they are used
+            module.state = UNLOADED
+            module.namespace.value.clear()
+            module.cache.clear()
+            raise
+        finally:
+            scopes.set_module(previous)
+            scopes.scopes.extend(frames)
+    # tokenizes, parses and optimizes a module's file
+    def _compilemodule (self, module : Module) -> list:
+        with open(module.path) as f:
+            line = f.read()
+        tokens = []
+        self._lex(line, 0, len(line), tokens)
+        nodes = Parser(tokens, None, module).parse()
+        if (self.flags["optimize"]):
+            nodes = self.optimize(nodes, False)
+        return nodes
+    # loads a global or constant variable for the virtual machine and caches its unboxed value
+    def _loadglobal (self, name : str):
+        # constants can't be reassigned so looking in the global scope first gives the same result as looking in the constant scope first
+        for scope in (self.scopes[1], self.scopes[0]):
+            if (name in scope.value):
+                value = unbox(scope[name])
+                self.scopes.cache[name] = value
+                return value
+        # undefined variable name
+        raise Exception(3)
+    # loads a local variable for the virtual machine, falls back to globals if the variable hasn't been set yet
+    def _loadlocal (self, frame : Frame, name : str):
+        if (frame.slots[frame.index[name]] is UNSET):
+            return self._loadglobal(name)
+        return unbox(frame[name])
+    # records the line virtual machine code stopped on, pc is the index of the instruction that was running
+    def _recordstop (self, code : Code, pc : int) -> None:
+        line = code.getline(pc)
+        if (line):
+            self.recent.append(line)
+    # runs bytecode, returns the unboxed returned value or NORET if the code didn't return
+    def runcode (self, code : Code, frame : Frame = None):
+        # local lookups for the dispatch loop
+        consts = code.consts
+        names = code.names
+        varnames = code.varnames
+        slots = frame.slots if frame is not None else None
+        scopes = self.scopes
+        gcache = scopes.cache
+        frames = scopes.scopes
+        constants = frames[0].value
+        # gets and sets go through the namespaces when they are audited or hooked
+        audit = scopes.traced
+        # the line being run and when it started, lines are only marked in code compiled while statements are traced
+        profiler = self.profiler
+        line = 0
+        linestart = 0.0
+        # records variable writes
+        record = self.recent.append
+        # value stack
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        # index of the instruction being run so errors know where they happened
+        pc = 0
+        try:
+            # code has no jumps so instructions are run in order
+            for pc, op, arg in code.instrs:
+                # opcodes are checked from most to least common, operators are checked in groups
+                if (op == LOADL):
+                    value = slots[arg]
+                    if (value is UNSET or audit):
+                        value = self._loadlocal(frame, varnames[arg])
+                    push(value)
+                elif (op == LOADG):
+                    value = gcache.get(names[arg], UNSET)
+                    if (value is UNSET or audit):
+                        value = self._loadglobal(names[arg])
+                    push(value)
+                elif (op == LOADC):
+                    push(consts[arg])
+                elif (op >= ADDC):
+                    if (op == ADDC):
+                        stack[-1] = stack[-1] + consts[arg]
+                    elif (op == MULC):
+                        stack[-1] = stack[-1] * consts[arg]
+                    elif (op == SUBC):
+                        stack[-1] = stack[-1] - consts[arg]
+                    elif (op == DIVC):
+                        stack[-1] = stack[-1] / consts[arg]
+                    else:
+                        stack[-1] = stack[-1] % consts[arg]
+                elif (op <= MOD):
+                    if (op == STOREL):
+                        value = pop()
+                        if (audit):
+                            frame[varnames[arg]] = box(value)
+                        else:
+                            slots[arg] = value
+                        record((varnames[arg], value))
+                    elif (op == STOREG):
+                        name = names[arg]
+                        # checks that assignment is not being done to a constant variable
+                        if (name in constants):
+                            raise Exception(1)
+                        value = pop()
+                        scopes[1][name] = box(value)
+                        gcache[name] = value
+                        record((name, value))
+                    elif (op == ADD):
+                        mod = pop()
+                        stack[-1] = stack[-1] + mod
+                    elif (op == MUL):
+                        mod = pop()
+                        stack[-1] = stack[-1] * mod
+                    elif (op == SUB):
+                        mod = pop()
+                        stack[-1] = stack[-1] - mod
+                    elif (op == DIV):
+                        mod = pop()
+                        stack[-1] = stack[-1] / mod
+                    elif (op == MOD):
+                        mod = pop()
+                        stack[-1] = stack[-1] % mod
+                    else:
+                        pop()
+                elif (op == CALL):
+                    # gets the arguments and the function
+                    args = stack[len(stack)-arg:]
+                    del stack[len(stack)-arg:]
+                    func = stack[-1]
+                    # checks that the value can be called
+                    if (not isinstance(func, Token) or func.type != FUN):
+                        raise Exception(5)
+                    stack[-1] = self.callvm(func, args)
+                    audit = scopes.traced
+                elif (op == RETURN):
+                    return pop()
+                elif (op <= GE):
+                    mod = pop()
+                    # arrays are compared element-wise
+                    if (stack[-1].__class__ is NumArray or mod.__class__ is NumArray):
+                        stack[-1] = cmpfuncs[op](stack[-1], mod)
+                    elif (op == EQ):
+                        stack[-1] = type(stack[-1]) is type(mod) and stack[-1] == mod
+                    elif (op == NE):
+                        stack[-1] = type(stack[-1]) is not type(mod) or stack[-1] != mod
+                    elif (op == LT):
+                        stack[-1] = stack[-1] < mod
+                    elif (op == LE):
+                        stack[-1] = stack[-1] <= mod
+                    elif (op == GT):
+                        stack[-1] = stack[-1] > mod
+                    else:
+                        stack[-1] = stack[-1] >= mod
+                elif (op <= NEG):
+                    if (op == NOT):
+                        stack[-1] = not stack[-1]
+                    elif (op == NEG):
+                        stack[-1] = -stack[-1]
+                    else:
+                        mod = pop()
+                        if (op == AND):
+                            stack[-1] = stack[-1] & mod
+                        elif (op == OR):
+                            stack[-1] = stack[-1] | mod
+                        else:
+                            stack[-1] = stack[-1] ^ mod
+                elif (op == RETV):
+                    return None
+                elif (op == KEYWORD):
+                    value = self._dokeyword(*consts[arg])
+                    # python blocks in function bodies can return values, only function bodies are run with a frame
+                    if (value is not None and frame is not None):
+                        return unbox(value)
+                elif (op == FLAG):
+                    self._setflag(consts[arg])
+                    audit = scopes.traced
+                    # the record flag can replace the record
+                    record = self.recent.append
+                    # the profile flag can start or stop profiling, the line being timed ends at the flag
+                    if (self.profiler is not profiler):
+                        if (line):
+                            profiler.line(line, perf_counter() - linestart)
+                        profiler = self.profiler
+                        line = 0
+                elif (op == APPENDL):
+                    value = slots[arg]
+                    if (value is UNSET or audit):
+                        value = self._loadlocal(frame, varnames[arg])
+                    value = concat(value, pop())
+                    if (audit):
+                        frame[varnames[arg]] = box(value)
+                    else:
+                        slots[arg] = value
+                    record((varnames[arg], value))
+                elif (op == LOADB):
+                    name = names[arg]
+                    value = scopes[1].value.get(name)
+                    if (value is None):
+                        value = self._loadglobal(name)
+                    else:
+                        # audited and hooked scopes are read through so the get is seen
+                        if (audit):
+                            value = scopes[1][name]
+                        # appends to the builder the variable stores instead of its joined value
+                        if (value.__class__ is not StrBuilder):
+                            value = unbox(value)
+                    push(value)
+                elif (op == APPENDG):
+                    name = names[arg]
+                    # checks that assignment is not being done to a constant variable
+                    if (name in constants):
+                        raise Exception(1)
+                    mod = pop()
+                    value = concat(pop(), mod)
+                    scopes[1][name] = box(value)
+                    record((name, value))
+                elif (op == LOADS):
+                    push(self._loadlocal(frame, varnames[arg]))
+                elif (op == ARRAY):
+                    values = stack[len(stack)-arg:]
+                    del stack[len(stack)-arg:]
+                    push(NumArray.fromvalues(values))
+                elif (op == ATTR):
+                    stack[-1] = unbox(self.getattribute(stack[-1], names[arg]))
+                elif (op == IMPORT):
+                    push(self.importmodule(names[arg]))
+                elif (op == LINE):
+                    for hook in self.hooks["statement"]:
+                        hook(arg)
+                    # times the line that ended
+                    if (profiler is not None):
+                        now = perf_counter()
+                        if (line):
+                            profiler.line(line, now - linestart)
+                        line = arg
+                        linestart = now
+        except TypeError:
+            # invalid types for operation
+            self._recordstop(code, pc)
+            raise Exception(5)
+        except ZeroDivisionError:
+            # divide by zero
+            self._recordstop(code, pc)
+            raise Exception(6)
+        except Exception:
+            # records the line errors happened on, errors of calls are recorded again with the line of the call in each frame they pass through
+            self._recordstop(code, pc)
+            raise
+        finally:
+            # times the last line
+            if (line):
+                profiler.line(line, perf_counter() - linestart)
+        return NORET
+    # evaluates an expression node
+    def evaluate (self, node : Node) -> Token:
+        t = node.type
+        # constant
+        if (t == CST):
+            return node.value
+        # variable
+        if (t == VAR):
+            return self.deref(node.value)
+        # mathmatical operation
+        if (t == BIN):
+            try:
+                return self.domod(self.evaluate(node.args[0]), node.value, self.evaluate(node.args[1]))
+            except TypeError:
+                # invalid types for operation
+                raise Exception(5)
+            except ZeroDivisionError:
+                # divide by zero
+                raise Exception(6)
+        # function call
+        if (t == CAL):
+            func = self.evaluate(node.value)
+            # checks that the value can be called
+            if (func.type != FUN):
+                raise Exception(5)
+            return self.call(func, [self.evaluate(arg) for arg in node.args])
+        # comparison
+        if (t == CMP):
+            return self.docomp(self.evaluate(node.args[0]), node.value, self.evaluate(node.args[1]))
+        # logical operation
+        if (t == LGC):
+            return self.dologic(self.evaluate(node.args[0]), node.value, self.evaluate(node.args[1]))
+        # unary operation
+        if (t == UNA):
+            value = self.evaluate(node.args[0])
+            if (node.value == "!"):
+                return booltokens[not value.value]
+            try:
+                result = -value.value
+            except TypeError:
+                # invalid type for operation
+                raise Exception(5)
+            return Token(self._getttype(result), result)
+        # module attribute
+        if (t == ATR):
+            return self.getattribute(self.evaluate(node.args[0]), node.value)
+        # import
+        if (t == IMP):
+            return self.importmodule(node.value)
+        # array literal
+        if (t == LIT):
+            try:
+                return Token(ARR, NumArray.fromvalues([self.evaluate(arg).value for arg in node.args]))
+            except TypeError:
+                # arrays can only hold numbers
+                raise Exception(5)
+        # statements don't have values
+        raise Exception(10)
+    # runs a keyword statement
+    def _dokeyword (self, keyword : str, args : tuple) -> Token:
+        # python
+        if (keyword == "python"):
+            # argument is python code
+            if (len(args) > 0):
+                # evaluates python code
+                ret = self.doPython({"code":args[0].value})
+            else:
+                # runs python function
+                ret = self.pythonFunc([])
+            # python blocks that return a value return it like a return statement when they are in a function body
+            return None if ret is VOID else ret
+        # audit
+        elif (keyword == "audit"):
+            # prints audit message
+            self.output.print(f"{self.colors.audithead}AUDIT:{self.colors.audit}")
+            # checks if a variable was given
+            if (len(args) > 0):
+                # checks that the argument is a valid variable name
+                if (not self.deref(args[0].value, check=True)):
+                    raise Exception(7)
+                # audits the variable
+                self._printvar(args[0].value)
+            else:
+                # audits the NamespaceList
+                self._printvars()
+            self.output.print(self.colors.reset, end="")
+        # system color
+        elif (keyword == "color"):
+            # changes system color
+            self.colors[args[0].value] = args[1].value
+        # dump
+        elif (keyword == "dump"):
+            # performs a dump
+            self._dump(args[0].value, self.tokens)
+        # existing
+        elif (keyword == "existing"):
+            # checks that the given variable name exists
+            self._exists(args[0].value)
+    # sets a system flag from a config token's value
+    def _setflag (self, value : tuple) -> None:
+        # sets the execution engine
+        if (value[0] == "engine"):
+            if (value[1] in self.engines):
+                self.engine = value[1]
+        # turns profiling on or off
+        elif (value[0] == "profile"):
+            self.flags["profile"] = {"on":True, "off":False, "switch":not self.flags["profile"]}[value[1]]
+            if (self.flags["profile"]):
+                if (self.profile is None):
+                    self.profile = Profiler(self.filename)
+                self.profiler = self.profile
+                self.profile.start()
+            elif (self.profile is not None):
+                self.profiler = None
+                self.profile.stop()
+            self._updatetracing()
+        elif (value[0] in self.flags.keys()):
+            # sets system flag
+            self.flags[value[0]] = {"on":True, "off":False, "switch":not self.flags[value[0]]}[value[1]]
+        elif (value[0] == "audit"):
+            self.scopes.audit = {"on":True, "off":False, "switch":not self.scopes.audit}[value[1]]
+        # sets the memo size
+        elif (value[0] == "memo"):
+            self.memosize = int(value[1]) if value[1].isdigit() else {"on":128, "off":0}.get(value[1], self.memosize)
+            # removes results that don't fit
+            for func in self.memos:
+                func.memo.resize(self.memosize)
+        # sets how many entries of recent execution are kept
+        elif (value[0] == "record"):
+            size = int(value[1]) if value[1].isdigit() else {"on":32, "off":0}.get(value[1], self.recent.maxlen)
+            # the record is only replaced when its size changes since running code holds on to it
+            if (size != self.recent.maxlen):
+                self.recent = deque(self.recent, maxlen=size)
     # prints an error message
     def _perr (self, type : str, value : str) -> None:
-        print(f"{self.colors.error}{type}: {value}{self.colors.reset}")
+        self.output.print(f"{self.colors.error}{type}: {value}{self.colors.reset}")
     # handles error codes
     def err (self, code : int) -> None:
         if (code == 0):
@@ -996,127 +3708,42 @@ class Interpreter ():
             self._perr("EmptyFuncArgError", "function argument had no value")
         elif (code == 9):
             self._perr("MissingFuncArgError", "missing required function argument")
+        elif (code == 10):
+            self._perr("SyntaxError", "invalid syntax")
+        elif (code == 11):
+            self._perr("ModuleNotFoundError", "no module file with that name")
+        elif (code == 12):
+            self._perr("ImportCycleError", "module variable used before the module set it, the module is still loading")
     # evaluates tokens
-    def evaltokens (self, tokens) -> None:
+    def evaltokens (self, tokens) -> list:
         # converts from strings to tokens if necessary
         if (type(tokens) == str):
             tokens = self.tokenize(tokens)
-        # token index
-        tind = 0
-        # loops through tokens
-        while tind < len(tokens):
-            # print(tind)
-            # gets token
-            token = tokens[tind]
-            # error token
-            if (token.type == ERR):
-                raise Exception(token.value)
-            # keyword tokens
-            elif (token.type == KWD):
-                # python
-                if (token.value == "python"):
-                    # next token is python code
-                    if (tokens[tind+1].type == "python"):
-                        # evaluates python code
-                        tokens[tind] = self.doPython({"code":tokens[tind+1].value})
-                    else:
-                        # runs python function
-                        tokens[tind] = self.pythonFunc(tokens[tind:])
-                    # pops the next token
-                    tokens.pop(tind+1)
-                # function
-                elif (token.value == "func"):
-                    # gets function name
-                    name = tokens[tind+1].value
-                    # checks name isn't same as a constant variable
-                    if (name in self.scopes[0].keys()):
-                        # assignment to constant
-                        raise Exception(1)
-                    # puts function into lowest namespace
-                    self.scopes[-1][name], tind = self.getfunc(tokens, tind)
-                    # continues evaluating tokens
-                    continue
-                # audit
-                elif (token.value == "audit"):
-                    # prints audit message
-                    print(f"{self.colors.audithead}AUDIT:{self.colors.audit}")
-                    # checks if the next token has type audit
-                    if (len(tokens) > tind+1 and tokens[tind+1].type == "audit"):
-                        # checks that the argument is a valid variable name
-                        if (not self.deref(tokens[tind+1].value, check=True)):
-                            raise Exception(7)
-                        # audits the variable
-                        self._printvar(tokens[tind+1].value)
-                        # increments tind
-                        tind += 1
-                    else:
-                        # audits the NamespaceList
-                        self._printvars()
-                    print(self.colors.reset, end="")
-                # system color
-                elif (token.value == "color"):
-                    # changes system color
-                    self.colors[tokens[tind+1].value] = tokens[tind+2].value
-                    # increases tind
-                    tind += 2
-                # dump
-                elif (token.value == "dump"):
-                    # performs a dump
-                    self._dump(tokens[tind+1].value, tokens)
-                    # increments tind
-                    tind += 1
-                # existing
-                elif (token.value == "existing"):
-                    # checks that the given variable name exists
-                    self._exists(tokens[tind+1].value)
-                    # increments tind
-                    tind += 1
-                # return
-                elif (token.value == "return"):
-                    return tokens[tind+1:]
-            # config token
-            elif (token.type == CON):
-                if (token.value[0] in self.flags.keys()):
-                    # sets system flag
-                    self.flags[token.value[0]] = {"on":True, "off":False, "switch":not self.flags[token.value[0]]}[token.value[1]]
-                else:
-                    v = token.value[0]
-                    if (v == "audit"):
-                        self.scopes.audit = {"on":True, "off":False, "switch":not self.scopes.audit}[token.value[1]]
-            # assignment token
-            elif (token.type == ASS):
-                # checks assignment type
-                if (token.value == "="):
-                    # checks that assignment is not being done to a constant variable
-                    if (self.tokens[tind-1].value in self.scopes[0].keys()):
-                        # assignment to constant
-                        raise Exception(1)
-                    # sets variable and tind
-                    self.scopes[-1][self.tokens[tind-1].value], tind = self.getexp(tokens, tind)
-                else:
-                    # expands assignment operator
-                    tokens.insert(tind+1, Token(MAT, token.value[0]))
-                    tokens.insert(tind+1, Token(REF, tokens[tind-1].value))
-                    tokens[tind] = Token(ASS, "=")
-                    # continues evaluation
-                    continue
-            # mathmatical operator
-            elif (token.type == MAT):
-                ret, ni = self.getexp(tokens, tind-2)
-                for i in range((ni-tind)+1):
-                    tokens.pop(tind)
-                tokens[tind-1] = ret
-                continue
-            # function token
-            elif (token.type == FUN):
-                tokens, placeholder = self.runfunc(tokens, tind)
-            # reference token
-            elif (token.type == REF and (len(tokens)-1 == tind or tokens[tind+1].type != ASS)):
-                tokens[tind] = self.deref(token)
-                continue
-            # increments tind
-            tind += 1
-        return tokens
+        # parses the tokens
+        nodes = self.parse(tokens)
+        # applies engine and optimize flags before running so they decide how the code is run
+        for node in nodes:
+            if (node.type == CFG and node.value[0] in ("engine", "optimize")):
+                self._setflag(node.value)
+            # profiling starts at its flag, the code is compiled with its lines so they can be timed from there
+            elif (node.type == CFG and node.value[0] == "profile"):
+                self.marklines = True
+        # optimizes the code
+        if (self.flags["optimize"]):
+            nodes = self.optimize(nodes)
+        try:
+            # runs the code with the virtual machine
+            if (self.engine == "vm"):
+                ret = self.runcode(self.compile(nodes))
+                return [VOID if ret is NORET else box(ret)]
+            # runs the code with the tree walker
+            ret = self.execute(nodes)
+            # returns the returned token
+            return [VOID if ret is None else ret]
+        finally:
+            # streamed code is flushed by _runstream and when the run ends so its statements are written in batches
+            if (not self.stream):
+                self.output.flush()
     # checks if a variable exists
     def _exists (self, name : str) -> None:
         # does the check
@@ -1124,25 +3751,112 @@ class Interpreter ():
         # formats message
         x = {True:"exists", False:"does not exist"}[x]
         # prints message
-        print(f"{self.colors.output}variable \"{name}\" {x}{self.colors.reset}")
+        self.output.print(f"{self.colors.output}variable \"{name}\" {x}{self.colors.reset}")
     # dumps program tokens
     def _dumptokens (self, tokens : list) -> None:
         # start dump
-        print(f"{self.colors.output}dumping tokens{self.colors.reset}")
+        self.output.print(f"{self.colors.output}dumping tokens{self.colors.reset}")
         # loop over tokens
         for token in tokens:
             # print formatted token
-            print(token.dump())
+            self.output.print(token.dump())
+        # end dump
+        self.output.print(f"{self.colors.output}end dump{self.colors.reset}")
+    # dumps the program's bytecode
+    def _dumpbytecode (self) -> None:
+        # start dump
+        self.output.print(f"{self.colors.output}dumping bytecode{self.colors.reset}")
+        # the bytecode is compiled from optimized nodes when the code is optimized
+        nodes = self.parse(self.tokens)
+        if (self.flags["optimize"]):
+            nodes = self.optimize(nodes)
+        # print disassembled code
+        self.output.print(self.compile(nodes).dump())
+        # end dump
+        self.output.print(f"{self.colors.output}end dump{self.colors.reset}")
+    # dumps the program's optimized nodes
+    def _dumpoptimized (self) -> None:
+        # start dump
+        self.output.print(f"{self.colors.output}dumping optimized nodes{self.colors.reset}")
+        # functions are dumped after the code that defines them
+        queue = [("<program>", self.optimize(self.parse(self.tokens)))]
+        for title, nodes in queue:
+            self.output.print(f"{title}:")
+            for node in nodes:
+                # prints the node
+                self.output.print(node.dump(1))
+                if (node.type == DEF):
+                    queue.append((node.value[0], node.value[1].value.getnodes()))
+        # end dump
+        self.output.print(f"{self.colors.output}end dump{self.colors.reset}")
+    # dumps the memo counters of pure functions
+    def _dumpmemo (self) -> None:
+        # start dump
+        self.output.print(f"{self.colors.output}dumping memo (size {self.memosize}){self.colors.reset}")
+        for func in self.memos:
+            memo = func.memo
+            # prints the function's counters
+            self.output.print(f"{func.name or '<function>'} : {memo.hits} hits, {memo.misses} misses, {len(memo.cache)} results")
         # end dump
-        print(f"{self.colors.output}end dump{self.colors.reset}")
+        self.output.print(f"{self.colors.output}end dump{self.colors.reset}")
+    # dumps the profile
+    def _dumpprofile (self) -> None:
+        # start dump
+        self.output.print(f"{self.colors.output}dumping profile{self.colors.reset}")
+        if (self.profile is None):
+            self.output.print("profiling is off")
+        else:
+            self.output.print(self.profile.report())
+        # end dump
+        self.output.print(f"{self.colors.output}end dump{self.colors.reset}")
+    # writes the profile to a file python profile viewers can load, returns its path
+    def saveprofile (self, path : str = None) -> str:
+        # the profile is written next to the source file by default
+        if (path is None):
+            path = os.path.splitext(self.filename)[0] + ".prof"
+        self.profile.save(path)
+        return path
+    # dumps the recorded statements and variable writes, oldest first
+    def _dumprecent (self) -> None:
+        # start dump
+        self.output.print(f"{self.colors.output}dumping recent execution{self.colors.reset}")
+        # source lines keyed by line number, only the lines of the recorded statements are found instead of splitting the whole source
+        source = {}
+        # source lines are only kept when the code isn't streamed
+        if (not self.stream):
+            wanted = {entry.line for entry in self.recent if entry.__class__ is Node}
+            # the mapping is scanned without decoding it unless its newlines have to be normalized
+            lines = self.source if self.source.find(b"\r") == -1 else self.lines.encode()
+            start = 0
+            # scans newlines up to the last line needed
+            for number in range(1, max(wanted, default=0) + 1):
+                end = lines.find(b"\n", start)
+                if (number in wanted):
+                    source[number] = (lines[start:] if end == -1 else lines[start:end]).decode()
+                if (end == -1):
+                    break
+                start = end + 1
+        for entry in self.recent:
+            # statements
+            if (entry.__class__ is Node):
+                text = source[entry.line].strip() if entry.line in source else nodenames[entry.type]
+                self.output.print(f"line {entry.line}: {text}")
+            # lines virtual machine code stopped on
+            elif (entry.__class__ is int):
+                self.output.print(f"stopped on line {entry}")
+            # variable writes
+            else:
+                self.output.print(f"\t{entry[0]} = {box(entry[1])}")
+        # end dump
+        self.output.print(f"{self.colors.output}end dump{self.colors.reset}")
     # dumps the NamespaceList
     def _dumpspace (self) -> None:
         # start dump
-        print(f"{self.colors.output}dumping namespaces:{self.colors.reset}")
+        self.output.print(f"{self.colors.output}dumping namespaces:{self.colors.reset}")
         # print NamespaceList
-        print(self.scopes)
+        self.output.print(self.scopes)
         # end dump
-        print(f"{self.colors.output}end dump{self.colors.reset}")
+        self.output.print(f"{self.colors.output}end dump{self.colors.reset}")
     # does a dump
     def _dump (self, scope : str, tokens : list = None) -> None:
         # if tokens are being dumped
@@ -1153,20 +3867,44 @@ class Interpreter ():
         if (scope == "space"):
             self._dumpspace()
             return
+        # if the program's bytecode is being dumped
+        if (scope == "bytecode"):
+            self._dumpbytecode()
+            return
+        # if the program's optimized nodes are being dumped
+        if (scope == "optimized"):
+            self._dumpoptimized()
+            return
+        # if memoized functions are being dumped
+        if (scope == "memo"):
+            self._dumpmemo()
+            return
+        # if the profile is being dumped
+        if (scope == "profile"):
+            self._dumpprofile()
+            return
+        # if recent execution is being dumped
+        if (scope == "recent"):
+            self._dumprecent()
+            return
+        # checks that scope is a valid object to dump
+        if (scope not in ("global", "local", "constant")):
+            self.output.print(f"{self.colors.output}{scope}{self.colors.reset}", len(scope))
+            return
         # sets auditing to true
         self.scopes.auditing = True
         # gets scope index
         index = 1 if scope == "global" else len(self.scopes) - 1 if scope == "local" else 0
         # prints which scope is being dumped
-        print(f"{self.colors.output}dumping {scope} scope:{self.colors.reset}")
+        self.output.print(f"{self.colors.output}dumping {scope} scope:{self.colors.reset}")
         # gets scope
         scope = self.scopes[index]
         # loops over scope keys
         for key in scope.keys():
             # prints key value pairs
-            print(f"{key} : {scope[key]}")
+            self.output.print(f"{key} : {scope[key]}")
         # end dump
-        print(f"{self.colors.output}end dump{self.colors.reset}")
+        self.output.print(f"{self.colors.output}end dump{self.colors.reset}")
         # sets auditing to false
         self.scopes.auditing = False
     # prints values of a variable name from all scopes
@@ -1180,9 +3918,9 @@ class Interpreter ():
             # checks that the variable is in the scope
             if (vname in scope.keys()):
                 # prints variable scope
-                print(self.colors.audithead, "globa scope:" if i == 1 else f"local scope ({i-2}):" if i > 1 else "constant scope:", self.colors.audit, end=" ")
+                self.output.print(self.colors.audithead, "globa scope:" if i == 1 else f"local scope ({i-2}):" if i > 1 else "constant scope:", self.colors.audit, end=" ")
                 # prints variable
-                print(f"{vname} = {scope[vname]}")
+                self.output.print(f"{vname} = {scope[vname]}")
         # sets auditing to false
         self.scopes.auditing = False
     # prints all variables
@@ -1194,46 +3932,172 @@ class Interpreter ():
             # gets scope
             scope = self.scopes[i]
             # prints what scope it is
-            print(self.colors.audithead, "global scope:" if i == 1 else f"local scope ({i-2}):" if i > 1 else "constant scope:", self.colors.audit)
+            self.output.print(self.colors.audithead, "global scope:" if i == 1 else f"local scope ({i-2}):" if i > 1 else "constant scope:", self.colors.audit)
             # loops over scope keys
             for key in scope.keys():
                 # prints formatted variable mapping
-                print(f"\t{key} : {scope[key]}")
+                self.output.print(f"\t{key} : {scope[key]}")
         # sets auditing to false
         self.scopes.auditing = False
-    # runs the interpreter
-    def run (self) -> None:
+    # runs the code statement by statement while it is being read, writes the output every flushevery statements
+    def _runstream (self, flushevery : int = 256) -> None:
+        with open(self.filename) as f:
+            for i, stmt in enumerate(self.tokenstream(f), 1):
+                self.evaltokens(stmt)
+                # long programs show their output while they run instead of when the buffer fills up
+                if (i % flushevery == 0):
+                    self.output.flush()
+    # runs the interpreter, returns the error code the program stopped with or None if it didn't stop with an error
+    def run (self) -> int:
         # sets maximum error code
-        self.mec = 9
-        # error info
-        errinfo = None
+        self.mec = 12
         try:
-            # runs program
-            self.evaltokens(self.lines)
-        except Exception:
-            # gets exception info
-            info = sys.exc_info()
-            # checks that exception argument is a valid error code
-            if (type(info[1].args[0]) == int and info[1].args[0] >= 0 and info[1].args[0] <= self.mec and info[0] == Exception and not self.flags["error"]):
-                # sets error info
-                errinfo = info[1].args[0]
-            else:
-                # re-raises error
-                raise info[1]
-        # checks if the vars flag is set
-        if (self.flags["vars"]):
-            # prints all variables
-            self._printvars()
-        # checks if the tokens flag is set
-        if (self.flags["tokens"]):
-            # prints all tokens
-            self._dumptokens()
-        # checks if there was an error
-        if (errinfo != None):
-            # displays error message
-            self.err(errinfo)
-
-# instansiates the interpreter
-inter = Interpreter(suppress=True)
-
-inter.run()
\ No newline at end of file
+            # error info
+            errinfo = None
+            try:
+                # runs program
+                if (self.stream):
+                    self._runstream()
+                else:
+                    self.evaltokens(self._gettokens())
+            except Exception:
+                # gets exception info
+                info = sys.exc_info()
+                # checks that exception argument is a valid error code
+                if (type(info[1].args[0]) == int and info[1].args[0] >= 0 and info[1].args[0] <= self.mec and info[0] == Exception and not self.flags["error"]):
+                    # sets error info
+                    errinfo = info[1].args[0]
+                    # calls error hooks
+                    for hook in self.hooks["error"]:
+                        hook(errinfo)
+                else:
+                    # re-raises error
+                    raise info[1]
+            # checks if the vars flag is set
+            if (self.flags["vars"]):
+                # prints all variables
+                self._printvars()
+            # checks if the tokens flag is set
+            if (self.flags["tokens"]):
+                # prints all tokens
+                self._dumptokens(self.tokens)
+            # checks if the program was profiled
+            if (self.profile is not None):
+                # stops timing the program and prints the profile
+                self.profile.stop()
+                self._dumpprofile()
+                # exports the profile
+                try:
+                    self.output.print(f"{self.colors.output}profile written to {self.saveprofile()}{self.colors.reset}")
+                except OSError:
+                    pass
+            # checks if there was an error
+            if (errinfo != None):
+                # displays what ran before the error
+                if (len(self.recent) > 0):
+                    self._dumprecent()
+                # displays error message
+                self.err(errinfo)
+            return errinfo
+        finally:
+            # the source file isn't needed once the program has run and its errors have been shown
+            self._closesource()
+            # writes the rest of the output, also when an error is re-raised
+            self.output.flush()
+
+# unloads every module so the next program that imports them runs them again, their compiled code is kept
+def resetmodules () -> None:
+    for module in modules.values():
+        module.state = UNLOADED
+        module.namespace.value.clear()
+        module.cache.clear()
+
+# runs a script with its own interpreter, returns its path, status, error code, captured output and run time, status is "ok", "error" if it stopped with an error code or "crash" if it couldn't be run
+def runscript (path : str, engine : str = "ast") -> tuple:
+    # imports redirect_stdout when a script is run so python blocks write to the script's output
+    from contextlib import redirect_stdout
+    out = io.StringIO()
+    inter = None
+    code = None
+    start = perf_counter()
+    try:
+        with redirect_stdout(out):
+            inter = Interpreter(path, suppress=True, engine=engine, output=out)
+            code = inter.run()
+        status = "ok" if code is None else "error"
+    # python blocks that exit stop their script instead of the worker
+    except (Exception, SystemExit) as e:
+        # missing files and python errors, the output written before the error is kept
+        if (inter is not None):
+            inter.output.flush()
+        out.write(f"{type(e).__name__}: {e}\n")
+        status = "crash"
+    finally:
+        # modules imported by the script aren't seen by the next script the worker runs
+        resetmodules()
+    return (path, status, code, out.getvalue(), perf_counter() - start)
+
+# runs scripts with a pool of worker processes, returns the result of each script in order
+def runbatch (paths : list, jobs : int = None, engine : str = "ast", chunksize : int = None) -> list:
+    jobs = (os.cpu_count() or 1) if jobs is None else jobs
+    # a single job runs the scripts in this process
+    if (jobs <= 1):
+        return [runscript(path, engine) for path in paths]
+    # imports the process pool when it is used so it isn't imported by every program
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    from functools import partial
+    # forked workers start with this module already imported, workers are kept for the whole batch and are sent scripts in chunks
+    context = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else None)
+    if (chunksize is None):
+        chunksize = max(1, len(paths) // (jobs * 4))
+    with ProcessPoolExecutor(jobs, mp_context=context) as pool:
+        return list(pool.map(partial(runscript, engine=engine), paths, chunksize=chunksize))
+
+# runs the batch runner from command line arguments, returns the exit status
+def batchmain (argv : list = None) -> int:
+    import argparse
+    import glob
+    parser = argparse.ArgumentParser(description="runs slowpp scripts with a pool of worker processes")
+    parser.add_argument("scripts", nargs="+", help="script paths or glob patterns")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="number of worker processes, defaults to the number of cpus, 1 runs the scripts in this process")
+    parser.add_argument("--engine", choices=("ast", "vm"), default="ast", help="execution engine the scripts start with")
+    parser.add_argument("--chunksize", type=int, default=None, help="scripts sent to a worker at a time")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only prints the status of each script and the summary")
+    args = parser.parse_args(argv)
+    # expands patterns, paths that aren't patterns are kept so missing scripts are reported
+    paths = []
+    for arg in args.scripts:
+        paths.extend(sorted(glob.glob(arg, recursive=True)) if glob.has_magic(arg) else [arg])
+    if (len(paths) == 0):
+        parser.error("no scripts matched")
+    jobs = (os.cpu_count() or 1) if args.jobs is None else args.jobs
+    start = perf_counter()
+    results = runbatch(paths, jobs, args.engine, args.chunksize)
+    elapsed = perf_counter() - start
+    # reports each script
+    counts = {"ok":0, "error":0, "crash":0}
+    for path, status, code, text, seconds in results:
+        counts[status] += 1
+        print(f"== {path}: {status}{'' if code is None else f' {code}'} ({seconds*1000:.1f} ms)")
+        if (not args.quiet and text):
+            print(text, end="" if text.endswith("\n") else "\n")
+    # reports throughput
+    print(f"ran {len(results)} scripts with {max(1, jobs)} worker(s) in {elapsed:.3f} s ({len(results)/elapsed:,.1f} scripts/s, {sum(r[4] for r in results):.3f} s in scripts)")
+    print(f"{counts['ok']} ok, {counts['error']} error(s), {counts['crash']} crash(es)")
+    return 0 if counts["ok"] == len(results) else 1
+
+# makes the default interpreter the first time main.inter is used, importing this module doesn't read code.spp
+def __getattr__ (name : str):
+    if (name == "inter"):
+        global inter
+        inter = Interpreter(suppress=True)
+        return inter
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+if (__name__ == "__main__"):
+    # scripts given on the command line are run by the batch runner
+    if (len(sys.argv) > 1):
+        sys.exit(batchmain())
+    # runs code.spp
+    Interpreter()
\ No newline at end of file